@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Benchmark SensorDatabase against synthetic histories of increasing size.
+
+Builds a fresh database per history length, then times bulk loading, live
+inserts through the writer thread, get_readings, the latest-reading lookup
+and graph-window queries. Prints p50/p99 latencies (ms) and file sizes as
+JSON on stdout; progress goes to stderr.
+
+Usage:
+  python3 benchmark_db.py                       # 1mo, 1y, 5y at 60 s
+  python3 benchmark_db.py --histories 1mo,1y --interval 5 --output pi4.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from config.constants import GRAPH_MAX_POINTS, SENSOR_DB_PARTITION
+from data.database import SensorDatabase, StorageTuning, READING_COLUMNS
+from utils.platform_detect import get_platform_name
+
+# History lengths selectable with --histories, in seconds
+HISTORIES = {
+    '1d': 86400,
+    '1w': 7 * 86400,
+    '1mo': 30 * 86400,
+    '1y': 365 * 86400,
+    '5y': 5 * 365 * 86400,
+}
+
+# Graph windows timed with get_series, in seconds
+GRAPH_WINDOWS = {
+    '24h': 86400,
+    '7d': 7 * 86400,
+    '30d': 30 * 86400,
+    '1y': 365 * 86400,
+}
+
+# Keep every raw row so queries run against the full history
+KEEP_EVERYTHING = {'raw': None, 60: None, 900: None, 3600: None, 14400: None, 86400: None}
+
+
+def log(message):
+    """Progress output that stays out of the JSON on stdout."""
+    print(message, file=sys.stderr, flush=True)
+
+
+def synthetic_chunks(start, end, interval, chunk_size, seed=0):
+    """
+    Yield lists of (ts, <READING_COLUMNS...>) rows from start to end, one
+    every `interval` seconds, with daily cycles and noise.
+    """
+    rng = np.random.default_rng(seed)
+    for chunk_start in range(start, end, interval * chunk_size):
+        ts = np.arange(chunk_start, min(end, chunk_start + interval * chunk_size), interval)
+        day = np.sin(2 * np.pi * (ts % 86400) / 86400)
+        n = len(ts)
+
+        columns = [
+            70 + 4 * day + rng.normal(0, 0.3, n),          # temperature
+            40 - 8 * day + rng.normal(0, 1.0, n),          # humidity
+            29.9 + rng.normal(0, 0.05, n),                 # pressure
+            50000 + 5000 * day + rng.normal(0, 500, n),    # gas_resistance
+            np.abs(3 + rng.normal(0, 1.0, n)),             # pm1
+            np.abs(8 + 3 * day + rng.normal(0, 2.0, n)),   # pm25
+            np.abs(12 + 4 * day + rng.normal(0, 3.0, n)),  # pm10
+        ]
+        values = np.round(np.column_stack(columns), 2).tolist()
+        yield [(int(t), *row) for t, row in zip(ts.tolist(), values)]
+
+
+def time_calls(func, repeat):
+    """Call func `repeat` times; return p50/p99/max latency in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples_ms):
+    """p50/p99/max of latency samples in ms."""
+    return {
+        'n': len(samples_ms),
+        'p50_ms': round(float(np.percentile(samples_ms, 50)), 3),
+        'p99_ms': round(float(np.percentile(samples_ms, 99)), 3),
+        'max_ms': round(float(np.max(samples_ms)), 3),
+    }
+
+
+def file_sizes(db_path, shard_dir):
+    """Bytes used by the main file, its WAL and the shard directory."""
+    sizes = {'main': 0, 'wal': 0, 'shards': 0, 'shard_files': 0}
+    if os.path.exists(db_path):
+        sizes['main'] = os.path.getsize(db_path)
+    if os.path.exists(db_path + '-wal'):
+        sizes['wal'] = os.path.getsize(db_path + '-wal')
+    if os.path.isdir(shard_dir):
+        for name in os.listdir(shard_dir):
+            sizes['shards'] += os.path.getsize(os.path.join(shard_dir, name))
+            sizes['shard_files'] += name.endswith('.db')
+    sizes['total'] = sizes['main'] + sizes['wal'] + sizes['shards']
+    return sizes
+
+
+def open_database(db_path, args):
+    """Open the benchmark database with the configured layout."""
+    return SensorDatabase(db_path, retention=KEEP_EVERYTHING, partition=args.partition,
+                          tuning=StorageTuning(batch_size=args.batch_size))
+
+
+def bench_history(label, span, args, work_dir):
+    """Build one synthetic history and time every operation against it."""
+    db_path = os.path.join(work_dir, f"bench_{label}.db")
+    shard_dir = os.path.splitext(db_path)[0] + "_shards"
+    end = int(time.time())
+    start = end - span
+    result = {'span_seconds': span}
+
+    # Bulk load
+    log(f"[{label}] Loading {span // args.interval} readings...")
+    db = open_database(db_path, args)
+    started = time.perf_counter()
+    rows = 0
+    for chunk in synthetic_chunks(start, end, args.interval, args.chunk_size):
+        rows += db.import_rows(chunk, chunk_size=args.chunk_size)['inserted']
+    elapsed = time.perf_counter() - started
+    db.close()
+    result['rows'] = rows
+    result['load_seconds'] = round(elapsed, 2)
+    result['load_rows_per_second'] = round(rows / elapsed) if elapsed else None
+    result['size_bytes'] = file_sizes(db_path, shard_dir)
+
+    # Queries, on a freshly opened database with nothing in memory
+    log(f"[{label}] Timing queries...")
+    db = open_database(db_path, args)
+    queries = {}
+    queries['get_readings_24h'] = time_calls(lambda: db.get_readings(24), args.repeat)
+    queries['get_latest_reading'] = time_calls(db.get_latest_reading, args.repeat)
+    for window, seconds in GRAPH_WINDOWS.items():
+        if seconds > span:
+            continue
+        queries[f"get_series_{window}"] = time_calls(
+            lambda: db.get_series('temperature', end - seconds, end, GRAPH_MAX_POINTS),
+            args.repeat)
+    queries['bucket_stats_7d_1h'] = time_calls(
+        lambda: db.bucket_stats('pm25', end - min(span, 7 * 86400), end, 3600), args.repeat)
+    result['queries'] = queries
+
+    # Live inserts through the writer thread, one group commit per batch
+    log(f"[{label}] Timing live inserts...")
+    samples = []
+    for _ in range(args.repeat):
+        for _ in range(args.batch_size):
+            db.log_reading(70.0, 40.0, 29.9, 50000.0, 3.0, 8.0, 12.0)
+        started = time.perf_counter()
+        db.flush()
+        samples.append((time.perf_counter() - started) * 1000)
+    result['insert_batch'] = summarize(samples)
+    result['insert_batch']['rows_per_batch'] = args.batch_size
+    db.close()
+
+    result['size_bytes_after_inserts'] = file_sizes(db_path, shard_dir)
+    if not args.keep:
+        os.remove(db_path)
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return result
+
+
+def main():
+    """Parse arguments, run the benchmarks and print the JSON report."""
+    parser = argparse.ArgumentParser(description="Benchmark SensorDatabase at scale")
+    parser.add_argument('--histories', default='1mo,1y,5y',
+                        help=f"comma-separated history lengths from {', '.join(HISTORIES)}")
+    parser.add_argument('--interval', type=int, default=60,
+                        help="seconds between synthetic readings (default: 60)")
+    parser.add_argument('--partition', default=SENSOR_DB_PARTITION,
+                        help="shard period, or 'none' for a single file")
+    parser.add_argument('--repeat', type=int, default=50,
+                        help="timed calls per query (default: 50)")
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help="rows per live insert batch (default: 50)")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="rows per bulk-load transaction (default: 50000)")
+    parser.add_argument('--dir', help="directory for the databases (default: a temp dir)")
+    parser.add_argument('--keep', action='store_true', help="keep the generated databases")
+    parser.add_argument('--output', help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.partition == 'none':
+        args.partition = None
+    labels = [label.strip() for label in args.histories.split(',') if label.strip()]
+    unknown = [label for label in labels if label not in HISTORIES]
+    if unknown:
+        parser.error(f"unknown histories: {', '.join(unknown)}")
+
+    work_dir = args.dir or tempfile.mkdtemp(prefix="sensor_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    report = {
+        'platform': {
+            'name': get_platform_name(),
+            'machine': platform.machine(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+        },
+        'config': {
+            'interval': args.interval,
+            'partition': args.partition,
+            'repeat': args.repeat,
+            'batch_size': args.batch_size,
+            'metrics': list(READING_COLUMNS),
+        },
+        'results': {},
+    }
+
+    try:
+        for label in labels:
+            report['results'][label] = bench_history(label, HISTORIES[label], args, work_dir)
+    finally:
+        if not args.keep and not args.dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        log(f"✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
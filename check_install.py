@@ -25,6 +25,7 @@ required = {
     'tkinter': 'python3-tk',
     'requests': 'requests',
     'matplotlib': 'matplotlib',
+    'numpy': 'numpy',
 }
 
 for module, package in required.items():
@@ -114,7 +115,7 @@ elif not errors:
 else:
     print("\n❌ Fix errors above before running.")
     print("\nQuick fixes:")
-    print("  pip3 install requests matplotlib")
+    print("  pip3 install requests matplotlib numpy")
     if any('tkinter' in e for e in errors):
         print("  sudo apt-get install python3-tk")
 
@@ -25,6 +25,7 @@ MODERATE_YELLOW = "#ca8a04"       # Warm yellow
 WARNING_ORANGE = "#ea580c"        # Bright orange
 ALERT_RED = "#dc2626"             # Strong red
 UNHEALTHY_PURPLE = "#7e22ce"      # Purple for very unhealthy
+HAZARDOUS_MAROON = "#7f1d1d"      # Maroon for hazardous
 
 # River flow colors (relative to normal)
 RIVER_HIGH = "#0369a1"            # Sky blue for high flow
@@ -64,19 +65,111 @@ WINDOW_HEIGHT = 480
 API_UPDATE_INTERVAL = 3600      # 60 minutes for river/weather
 SENSOR_DISPLAY_INTERVAL = 5     # 5 seconds for display update
 SENSOR_LOG_INTERVAL = 60        # 60 seconds for database logging
+DB_MAINTENANCE_INTERVAL = 3600  # 60 minutes between retention/vacuum passes
+DB_BACKUP_INTERVAL = 86400     # Daily online backup when DB_BACKUP_DIR is set
+SENSOR_RECENT_HOURS = 24        # Hours of readings kept in memory for graphs
+
+# Sensor drivers to poll (registered in data/drivers.py): 'bme680',
+# 'pmsa003i', 'scd4x'. Storage and the UI follow the metrics they declare.
+SENSOR_DRIVERS = ('bme680', 'pmsa003i')
+
+# Seconds between samples of each sensor, each in its own worker thread,
+# overriding the driver's preferred interval. The BME680 gas heater needs
+# time between readings; the PMSA003I produces a new reading every second.
+SENSOR_SAMPLE_INTERVALS = {
+    'bme680': 3.0,
+    'pmsa003i': 1.0
+}
+
+# High-rate mode: keep every sample (at the SENSOR_SAMPLE_INTERVALS rates)
+# and log one summary per SENSOR_LOG_INTERVAL, storing the mean while the
+# rollups keep the true min/max of all samples. False logs one snapshot.
+SENSOR_HIGH_RATE = True
+
+# I2C watchdog: a device read taking longer than SENSOR_READ_TIMEOUT seconds
+# is abandoned, and SENSOR_MAX_FAILURES failed reads in a row re-initialize
+# the device. A device with no good read for SENSOR_STALE_INTERVALS sample
+# intervals (plus the timeout) reads as None rather than its last values.
+# Read latencies are counted in SENSOR_LATENCY_BUCKETS_MS buckets.
+SENSOR_READ_TIMEOUT = 2.0
+SENSOR_MAX_FAILURES = 5
+SENSOR_STALE_INTERVALS = 3
+SENSOR_LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Smoothing applied to every sample before display and logging (see
+# data/filters.py): median of `window` samples, then an EMA with weight
+# `ema_alpha`, dropping isolated samples more than `outlier_mads` scaled
+# MADs (and at least `min_deviation`) from the median. None = raw values.
+# Metrics not listed use data/drivers.py's DEFAULT_FILTER at their precision.
+SENSOR_FILTERS = {
+    'temperature': {'window': 5, 'ema_alpha': 0.3, 'decimals': 1},
+    'humidity': {'window': 5, 'ema_alpha': 0.3, 'decimals': 1},
+    'pressure': {'window': 5, 'ema_alpha': 0.3, 'decimals': 2},
+    'gas_resistance': {'window': 5, 'ema_alpha': 0.2, 'outlier_mads': 4.0,
+                       'min_deviation': 5000, 'decimals': 0},
+    'pm1': {'window': 7, 'ema_alpha': 0.2, 'outlier_mads': 4.0,
+            'min_deviation': 5, 'decimals': 1},
+    'pm25': {'window': 7, 'ema_alpha': 0.2, 'outlier_mads': 4.0,
+             'min_deviation': 5, 'decimals': 1},
+    'pm10': {'window': 7, 'ema_alpha': 0.2, 'outlier_mads': 4.0,
+             'min_deviation': 5, 'decimals': 1}
+}
+
+# Smallest change per metric that redraws the sensor displays; a change of
+# AQI category always does. None = not shown, ignored. Driver metrics not
+# listed use their Metric.deadband, or one display step (data/drivers.py). The display is refreshed at least every
+# SENSOR_DISPLAY_MAX_AGE seconds regardless, to keep graphs current.
+SENSOR_DEADBANDS = {
+    'temperature': 0.1,     # °F
+    'humidity': 0.5,        # %
+    'pressure': 0.01,       # inHg
+    'gas_resistance': 5000, # Ohms
+    'pm1': None,
+    'pm25': 1.0,            # µg/m³
+    'pm10': None,
+    'aqi': 5,               # NowCast AQI points
+    'nowcast_pm25': None
+}
+SENSOR_DISPLAY_MAX_AGE = 300
+
+# Data source when no sensors are attached (see data/mock_sensors.py):
+#   {'mode': 'synthetic', 'seed': 1, 'speed': 1.0}  seeded, repeatable series
+#   {'mode': 'replay', 'path': 'readings.csv', 'speed': 60.0, 'loop': True}
+#       replay a CSV or sensor database, `speed` times faster than real time
+SENSOR_MOCK = {'mode': 'synthetic', 'seed': 1, 'speed': 1.0}
+
+# Raw sensor readings are stored in one shard file per period
+# ('day', 'month', 'year'), or None to keep everything in sensor_data.db
+SENSOR_DB_PARTITION = 'month'
+
+# Name this node's readings are stored under. Give each dashboard a unique
+# name before merging several databases into one hub (db_tool.py merge).
+# The database records it, and renaming relabels this node's stored history
+# on the next start (unless the new name already has readings there).
+# Copies already merged into a hub keep the old name.
+SENSOR_DEVICE_ID = 'local'
+
+# Directory for online database backups (e.g. a USB stick), or None to disable
+DB_BACKUP_DIR = None
+
+# Sensor database retention in seconds (None = keep forever)
+# 'raw' is individual readings; numeric keys are rollup bucket widths
+SENSOR_RETENTION = {
+    'raw': 7 * 86400,           # 7 days of raw readings
+    60: 90 * 86400,             # 90 days of 1-minute rollups
+    900: 365 * 86400,           # 1 year of 15-minute rollups
+    3600: None,                 # hourly rollups forever
+    14400: None,                # 4-hour rollups forever
+    86400: None                 # daily rollups forever
+}
 
 # Alert settings
-PM25_ALERT_THRESHOLD = 35.0     # Unhealthy for sensitive groups
+AQI_ALERT_THRESHOLD = 101       # NowCast AQI: unhealthy for sensitive groups
 ALERT_DISMISS_DURATION = 1200   # 20 minutes in seconds
 
-# Air quality thresholds (PM2.5) with colors
-AQI_THRESHOLDS = {
-    'good': (0, 12, FOREST_COLOR),
-    'moderate': (12, 35, MODERATE_YELLOW),
-    'unhealthy_sensitive': (35, 55, WARNING_ORANGE),
-    'unhealthy': (55, 150, ALERT_RED),
-    'very_unhealthy': (150, float('inf'), UNHEALTHY_PURPLE)
-}
+# Indoor graph time ranges (hours, button label) and plotted point cap
+GRAPH_TIME_RANGES = [(24, '24hr'), (48, '48hr'), (72, '72hr'), (168, '7d'), (720, '30d')]
+GRAPH_MAX_POINTS = 500
 
 # Pagination
 RIVERS_PER_PAGE = 5
@@ -0,0 +1,203 @@
+"""
+US EPA Air Quality Index for PM2.5, with the NowCast average.
+
+The AQI maps a concentration onto 0-500 by linear interpolation within the
+breakpoint table of the February 2024 PM2.5 standard revision. Official
+AQI values are 24-hour averages; the NowCast is EPA's estimate of one from
+the last 12 hourly averages, weighted toward recent hours when the air is
+changing, and it is what AirNow reports as the current AQI.
+
+NowCast keeps hourly sums and counts in a 12-slot ring, so adding a sample
+is O(1) and the current value costs 12 steps however many samples arrive.
+"""
+import math
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from config.constants import (ALERT_RED, FOREST_COLOR, HAZARDOUS_MAROON,
+                              MODERATE_YELLOW, UNHEALTHY_PURPLE, WARNING_ORANGE)
+
+
+class AQICategory(NamedTuple):
+    """One band of the AQI scale."""
+    key: str
+    name: str
+    short_name: str     # Fits narrow labels
+    color: str
+    emoji: str
+    aqi_low: int
+    aqi_high: int
+
+
+CATEGORIES = (
+    AQICategory('good', 'Good', 'Good', FOREST_COLOR, '✅', 0, 50),
+    AQICategory('moderate', 'Moderate', 'Moderate', MODERATE_YELLOW, '⚠️', 51, 100),
+    AQICategory('unhealthy_sensitive', 'Unhealthy for Sensitive Groups',
+                'Unhealthy for Sensitive', WARNING_ORANGE, '⚠️', 101, 150),
+    AQICategory('unhealthy', 'Unhealthy', 'Unhealthy', ALERT_RED, '🚨', 151, 200),
+    AQICategory('very_unhealthy', 'Very Unhealthy', 'Very Unhealthy',
+                UNHEALTHY_PURPLE, '🚨', 201, 300),
+    AQICategory('hazardous', 'Hazardous', 'Hazardous', HAZARDOUS_MAROON, '🚨', 301, 500),
+)
+
+# PM2.5 24-hour concentration breakpoints (µg/m³), one per CATEGORIES entry
+PM25_BREAKPOINTS = (
+    (0.0, 9.0),
+    (9.1, 35.4),
+    (35.5, 55.4),
+    (55.5, 125.4),
+    (125.5, 225.4),
+    (225.5, 325.4),
+)
+
+NOWCAST_HOURS = 12
+# Hours of the most recent 3 that must have data for a NowCast
+NOWCAST_MIN_RECENT = 2
+# Weight factor floor for particulate matter
+NOWCAST_MIN_WEIGHT = 0.5
+
+
+class AirQuality(NamedTuple):
+    """Current air quality: the PM2.5 the AQI is based on, and the AQI."""
+    pm25: float
+    aqi: int
+    category: AQICategory
+    nowcast: bool       # False when based on an instantaneous reading
+
+
+def pm25_to_aqi(pm25: float) -> int:
+    """
+    AQI of a PM2.5 concentration in µg/m³, truncated to 0.1 first as EPA
+    specifies. Concentrations beyond the table extend its top segment.
+    """
+    concentration = math.floor(max(pm25, 0.0) * 10 + 1e-9) / 10
+
+    for (c_low, c_high), category in zip(PM25_BREAKPOINTS, CATEGORIES):
+        if concentration <= c_high:
+            break
+    aqi_range = category.aqi_high - category.aqi_low
+    aqi = category.aqi_low + (concentration - c_low) * aqi_range / (c_high - c_low)
+    return int(math.floor(aqi + 0.5))
+
+
+def aqi_category(aqi: Optional[float]) -> Optional[AQICategory]:
+    """Category an AQI value falls in, or None for no value."""
+    if not isinstance(aqi, (int, float)):
+        return None
+    for category in CATEGORIES:
+        if aqi <= category.aqi_high:
+            return category
+    return CATEGORIES[-1]
+
+
+def pm25_category(pm25: Optional[float]) -> Optional[AQICategory]:
+    """Category of a PM2.5 concentration, or None for no value."""
+    if not isinstance(pm25, (int, float)):
+        return None
+    return aqi_category(pm25_to_aqi(pm25))
+
+
+class NowCast:
+    """
+    Incremental 12-hour NowCast of PM2.5.
+
+    Samples are bucketed by clock hour into a ring of sums and counts; a
+    slot is reused once its hour is 12 hours old, so no history is ever
+    scanned or trimmed. The hour in progress counts as the most recent hour,
+    which keeps the value current on every tick instead of once an hour.
+
+    Following EPA, a NowCast needs data in 2 of the 3 most recent hours.
+    The weight factor is 1 minus the range of the hourly averages over their
+    maximum, floored at 0.5, and hour i back is weighted by factor**i
+    (missing hours are skipped but still age the weights).
+    """
+
+    def __init__(self, hours: int = NOWCAST_HOURS):
+        self.hours = hours
+        self._hour = [None] * hours
+        self._sum = [0.0] * hours
+        self._count = [0] * hours
+        self._lock = threading.Lock()
+
+    def add(self, pm25: Optional[float], ts: float):
+        """Add a PM2.5 sample taken at epoch seconds `ts`; missing values are ignored."""
+        if not isinstance(pm25, (int, float)) or math.isnan(pm25):
+            return
+
+        hour = int(ts // 3600)
+        slot = hour % self.hours
+        with self._lock:
+            if self._hour[slot] != hour:
+                if self._hour[slot] is not None and self._hour[slot] > hour:
+                    # Older than the window
+                    return
+                self._hour[slot] = hour
+                self._sum[slot] = 0.0
+                self._count[slot] = 0
+            self._sum[slot] += pm25
+            self._count[slot] += 1
+
+    def load(self, series: Iterable[Tuple]):
+        """
+        Seed from stored (ts, mean, ...) rows such as SensorDatabase.get_series
+        returns. Each row counts as one sample, so load whole hours only.
+        """
+        for row in series:
+            self.add(row[1], row[0])
+
+    def hourly_averages(self, now: Optional[float] = None) -> List[Optional[float]]:
+        """
+        Average of each of the 12 hours up to `now` (default: the current
+        time), most recent first (None = no data). Hours keep aging when
+        samples stop, so a dead sensor's NowCast lapses after 2 hours.
+        """
+        if now is None:
+            now = time.time()
+
+        current = int(now // 3600)
+        averages = []
+        with self._lock:
+            for age in range(self.hours):
+                slot = (current - age) % self.hours
+                if self._hour[slot] == current - age and self._count[slot]:
+                    averages.append(self._sum[slot] / self._count[slot])
+                else:
+                    averages.append(None)
+        return averages
+
+    def value(self, now: Optional[float] = None) -> Optional[float]:
+        """NowCast PM2.5 in µg/m³ (truncated to 0.1), or None without enough data."""
+        averages = self.hourly_averages(now)
+        if sum(average is not None for average in averages[:3]) < NOWCAST_MIN_RECENT:
+            return None
+
+        present = [average for average in averages if average is not None]
+        highest = max(present)
+        weight = 1.0 if highest <= 0 else 1 - (highest - min(present)) / highest
+        weight = max(weight, NOWCAST_MIN_WEIGHT)
+
+        total = norm = 0.0
+        factor = 1.0
+        for average in averages:
+            if average is not None:
+                total += factor * average
+                norm += factor
+            factor *= weight
+        return math.floor(total / norm * 10 + 1e-9) / 10
+
+    def air_quality(self, pm25: Optional[float] = None,
+                    now: Optional[float] = None) -> Optional[AirQuality]:
+        """
+        AirQuality from the NowCast, falling back to the instantaneous
+        `pm25` until there are enough hours of data. None if neither exists.
+        """
+        concentration = self.value(now)
+        nowcast = concentration is not None
+        if not nowcast:
+            if not isinstance(pm25, (int, float)):
+                return None
+            concentration = pm25
+
+        aqi = pm25_to_aqi(concentration)
+        return AirQuality(concentration, aqi, aqi_category(aqi), nowcast)
@@ -0,0 +1,56 @@
+"""Reading sensor readings from CSV files (imports and replay)."""
+import csv
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Sequence
+
+from data.database import READING_COLUMNS
+
+
+def parse_timestamp(text: str, assume_utc: bool = False) -> int:
+    """
+    Parse epoch seconds or an ISO timestamp from a CSV cell.
+    Timestamps without an offset are local time unless assume_utc.
+    """
+    text = text.strip()
+    try:
+        return int(float(text))
+    except ValueError:
+        pass
+
+    parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if parsed.tzinfo is None and assume_utc:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def parse_value(text: Optional[str]) -> Optional[float]:
+    """Parse a metric cell; blank or non-numeric cells become None."""
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_csv_rows(path: str, assume_utc: bool = False, device: Optional[str] = None,
+                  metrics: Optional[Sequence[str]] = READING_COLUMNS) -> Iterator[Dict]:
+    """
+    Yield reading dicts from a CSV with a 'ts' or 'timestamp' column and
+    any of `metrics` (None: every other column). A 'device_id' column, or
+    else `device`, names the device; other columns are ignored.
+    """
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        time_column = 'ts' if 'ts' in fields else 'timestamp'
+        if time_column not in fields:
+            raise ValueError("CSV needs a 'ts' or 'timestamp' column")
+        if metrics is None:
+            metrics = [field for field in fields
+                       if field not in ('ts', 'timestamp', 'device_id')]
+
+        for record in reader:
+            row = {'ts': parse_timestamp(record[time_column], assume_utc)}
+            for metric in metrics:
+                row[metric] = parse_value(record.get(metric))
+            row['device_id'] = record.get('device_id') or device
+            yield row
@@ -1,92 +1,2019 @@
 """SQLite database operations for sensor data."""
+import calendar
+import glob
+import json
 import sqlite3
 import os
-from datetime import datetime, timedelta
-from typing import List, Tuple, Optional
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple, Optional, Sequence, Union
+from urllib.request import pathname2url
+
+import numpy as np
+
+from data.ring_buffer import ReadingRingBuffer
+
+# Bump when adding a step to SensorDatabase._migrate
+SCHEMA_VERSION = 6
+
+# Metric columns every sensor_readings table has, in tuple order after ts;
+# SensorDatabase(metrics=...) appends columns for further metrics
+READING_COLUMNS = ('temperature', 'humidity', 'pressure', 'gas_resistance',
+                   'pm1', 'pm25', 'pm10')
+
+# Metric names are interpolated into SQL as column names
+METRIC_NAME = re.compile(r'^[a-z][a-z0-9_]*$')
+
+# device_id of readings logged by a new database unless configured otherwise
+DEFAULT_DEVICE_ID = 'local'
+
+# Bucket widths (seconds) maintained in sensor_rollups, finest first
+ROLLUP_RESOLUTIONS = (60, 900, 3600, 14400, 86400)
+
+# Shard periods supported by SensorDatabase(partition=...)
+SHARD_PERIODS = ('day', 'month', 'year')
+
+# SQLite attaches at most 10 databases by default; leave room for main/temp
+MAX_ATTACHED_SHARDS = 8
+
+# What log_reading does when the writer queue is full
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+# Seconds to keep raw rows ('raw') and each rollup resolution; None = forever
+DEFAULT_RETENTION = {
+    'raw': 7 * 86400,
+    60: 90 * 86400,
+    900: 365 * 86400,
+    3600: None,
+    14400: None,
+    86400: None,
+}
+
+
+def to_epoch(value: Union[datetime, int, float]) -> int:
+    """
+    Convert a datetime or epoch value to integer epoch seconds.
+    Naive datetimes are interpreted as local time, matching datetime.now().
+    """
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(value)
+
+
+def shard_key(ts: int, partition: str) -> str:
+    """Name of the UTC day/month/year shard holding epoch second `ts`."""
+    t = time.gmtime(ts)
+    if partition == 'year':
+        return f"{t.tm_year:04d}"
+    if partition == 'month':
+        return f"{t.tm_year:04d}_{t.tm_mon:02d}"
+    return f"{t.tm_year:04d}_{t.tm_mon:02d}_{t.tm_mday:02d}"
+
+
+def shard_bounds(key: str) -> Tuple[int, int]:
+    """Return [start, end) epoch seconds covered by a shard key."""
+    parts = [int(part) for part in key.split('_')]
+    if len(parts) == 1:
+        year, = parts
+        return (calendar.timegm((year, 1, 1, 0, 0, 0)),
+                calendar.timegm((year + 1, 1, 1, 0, 0, 0)))
+    if len(parts) == 2:
+        year, month = parts
+        return (calendar.timegm((year, month, 1, 0, 0, 0)),
+                calendar.timegm((year + month // 12, month % 12 + 1, 1, 0, 0, 0)))
+    year, month, day = parts
+    start = calendar.timegm((year, month, day, 0, 0, 0))
+    return start, start + 86400
+
+
+class StorageTuning(NamedTuple):
+    """Performance knobs of a SensorDatabase; the defaults suit a Raspberry Pi."""
+    # SQLite synchronous level (OFF, NORMAL, FULL). NORMAL is crash-safe in
+    # WAL mode and avoids an fsync per commit.
+    synchronous: str = 'NORMAL'
+    cache_size_kb: int = 2048               # Page cache per connection, KiB
+    mmap_size: int = 32 * 1024 * 1024       # Bytes memory-mapped for reads (0 disables)
+    batch_size: int = 50                    # Queued readings that trigger a write
+    flush_interval: float = 120.0           # Seconds after which queued readings are written
+    queue_size: int = 1000                  # Maximum readings waiting for the writer
+    overflow: str = 'drop_oldest'           # OVERFLOW_POLICIES entry for a full queue
+    put_timeout: float = 1.0                # Seconds log_reading waits under 'block'
+    cache_size: int = 16                    # Results kept by get_recent_series
+    recent_hours: float = 24                # Hours held in the `recent` ring buffer
+    recent_interval: float = 5              # Expected seconds between `recent` readings
 
 
 class SensorDatabase:
-    """Manages sensor data storage and retrieval."""
+    """
+    Manages sensor data storage and retrieval.
+
+    Owns one long-lived writer connection (shared behind a lock), fed by a
+    writer thread draining a bounded queue, and one reader connection per
+    thread; WAL mode keeps readers from blocking writes. Raw readings are
+    (ts, <self.metrics...>) rows per device_id, optionally partitioned into
+    shard files, with count/sum/min/max rollups at every ROLLUP_RESOLUTIONS
+    width alongside. `recent` holds the last few hours in memory.
+    """
+
+    def __init__(self, db_path: str = "sensor_data.db", retention: Optional[Dict] = None,
+                 partition: Optional[str] = None, shard_dir: Optional[str] = None,
+                 device_id: Optional[str] = None, metrics: Sequence[str] = READING_COLUMNS,
+                 tuning: Optional[StorageTuning] = None):
+        """
+        Initialize database connection and create tables if needed.
+
+        retention:     Seconds to keep 'raw' rows and each rollup resolution
+                       (None = forever). Defaults to DEFAULT_RETENTION.
+        partition:     None for a single file, or a SHARD_PERIODS entry; raw
+                       readings then go to one shard file per UTC period.
+        shard_dir:     Directory for shard files (default: <db name>_shards).
+        device_id:     Device that log_reading and `recent` readings belong
+                       to; pre-device rows are assigned to it on upgrade.
+                       Default: the one recorded in the file, else
+                       DEFAULT_DEVICE_ID. Passing a new one relabels the
+                       readings of the recorded one (see _claim_device_id).
+        metrics:       Metrics to store; any beyond READING_COLUMNS get
+                       their own column, added to existing files on open.
+        tuning:        StorageTuning performance knobs.
+        """
+        tuning = tuning or StorageTuning()
+        if partition is not None and partition not in SHARD_PERIODS:
+            raise ValueError(f"partition must be one of {SHARD_PERIODS}")
+        if tuning.overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        invalid = [metric for metric in metrics if not METRIC_NAME.match(metric)]
+        if invalid:
+            raise ValueError(f"Invalid metric names: {invalid}")
 
-    def __init__(self, db_path: str = "sensor_data.db"):
-        """Initialize database connection and create tables if needed."""
         self.db_path = db_path
+        self.tuning = tuning
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self.partition = partition
+        self.shard_dir = shard_dir or os.path.splitext(db_path)[0] + "_shards"
+        self.device_id = device_id
+        self.metrics = READING_COLUMNS + tuple(
+            metric for metric in dict.fromkeys(metrics) if metric not in READING_COLUMNS)
+
+        if self.partition:
+            os.makedirs(self.shard_dir, exist_ok=True)
+
+        self._write_lock = threading.Lock()
+        self._readers_lock = threading.Lock()
+        self._readers = []
+        self._local = threading.local()
+        self._closed = False
+
+        # Writer queue state, all guarded by _queue_cond
+        self._queue_cond = threading.Condition()
+        self._queue = deque()
+        self._latest = None
+        self._stopping = False
+        self._flush_requested = 0
+        self._flush_served = 0
+        self._flush_written = 0
+        self._queued_since = None
+        # Bumped per committed batch; _write_log keeps (version, oldest ts)
+        self._data_version = 0
+        self._write_log = deque(maxlen=256)
+        self._stats = {
+            'rows_written': 0,
+            'batches_written': 0,
+            'dropped': 0,
+            'errors': 0,
+            'last_write_ms': 0.0,
+            'max_write_ms': 0.0,
+            'total_write_ms': 0.0,
+        }
+
+        self._cache_lock = threading.Lock()
+        self._cache = OrderedDict()
+
+        self.recent = ReadingRingBuffer(
+            self.metrics, max(1, int(tuning.recent_hours * 3600 / tuning.recent_interval)))
+
+        self._writer = self._connect()
         self.init_database()
 
+        self._writer_thread = threading.Thread(target=self._writer_loop,
+                                               name="SensorDatabaseWriter", daemon=True)
+        self._writer_thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the configured pragmas applied."""
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        # Only takes effect on a brand-new file; see _enable_incremental_vacuum
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.tuning.synchronous}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.tuning.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.tuning.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's reader connection, opening it on first use."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("SensorDatabase is closed")
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
     def init_database(self):
-        """Create tables if they don't exist."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Create tables if they don't exist and upgrade older schemas."""
+        with self._write_lock:
+            self._enable_incremental_vacuum()
+            version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+            recorded = self._recorded_device_id(version)
+            if self.device_id is None:
+                self.device_id = recorded or DEFAULT_DEVICE_ID
+            if version < SCHEMA_VERSION:
+                self._migrate(version)
+            self._add_metric_columns(self._writer, 'main')
+            if self.partition:
+                self._migrate_shards()
+            self._claim_device_id(recorded)
+
+    def _enable_incremental_vacuum(self):
+        """
+        Switch the file to auto_vacuum=INCREMENTAL. New files pick it up
+        immediately; existing files need a one-time VACUUM to convert.
+        """
+        conn = self._writer
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            print("Converting database to incremental auto-vacuum (one time)...")
+            conn.execute("VACUUM")
+
+    def _migrate(self, version: int):
+        """Apply schema upgrades from `version` to SCHEMA_VERSION in place."""
+        conn = self._writer
 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sensor_readings (
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+
+            if version < 1:
+                self._migrate_epoch_timestamps(conn)
+            if version < 2:
+                self._migrate_rollups(conn)
+            if version < 3:
+                self._migrate_devices(conn, 'main')
+            if version < 4:
+                self._migrate_history(conn)
+            if version < 5:
+                self._migrate_settings(conn)
+            if 2 <= version < 6:
+                self._migrate_four_hour_rollups(conn)
+            if version < 2:
+                # Backfill once sensor_rollups has its final shape
+                self._merge_rollups(conn, 'main.sensor_readings')
+
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _migrate_epoch_timestamps(self, conn: sqlite3.Connection):
+        """
+        Schema 1: store `ts` as integer epoch seconds (UTC) with a covering
+        index, replacing the CURRENT_TIMESTAMP text column.
+        """
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(sensor_readings)")]
+        legacy = 'timestamp' in columns
+
+        if legacy:
+            conn.execute("ALTER TABLE sensor_readings RENAME TO sensor_readings_legacy")
+
+        self._create_readings_schema(conn, 'main')
+
+        if legacy:
+            # Legacy timestamps are CURRENT_TIMESTAMP text, which is UTC
+            conn.execute('''
+                INSERT INTO sensor_readings
+                (id, device_id, ts, temperature, humidity, pressure,
+                 gas_resistance, pm1, pm25, pm10)
+                SELECT id, ?, CAST(strftime('%s', timestamp) AS INTEGER),
+                       temperature, humidity, pressure,
+                       gas_resistance, pm1, pm25, pm10
+                FROM sensor_readings_legacy
+                WHERE timestamp IS NOT NULL
+            ''', (self.device_id,))
+            conn.execute("DROP TABLE sensor_readings_legacy")
+
+    def _create_readings_schema(self, conn: sqlite3.Connection, schema: str):
+        """Create sensor_readings and its covering index in `schema`."""
+        columns = ',\n'.join(f"                {metric} REAL" for metric in self.metrics)
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.sensor_readings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                device_id TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+{columns}
+            )
+        ''')
+        # Covers every metric so range scans never touch the table itself;
+        # device_id leads so each device is one contiguous range
+        conn.execute(f'''
+            CREATE INDEX IF NOT EXISTS {schema}.idx_sensor_readings_device_ts
+            ON sensor_readings (device_id, ts, {', '.join(self.metrics)})
+        ''')
+
+    def _add_metric_columns(self, conn: sqlite3.Connection, schema: str):
+        """
+        Add columns for metrics that sensor_readings in `schema` lacks (a
+        newly configured sensor) and rebuild the covering index to include
+        them. Existing rows read NULL for the new metrics.
+        """
+        columns = [row[1] for row in
+                   conn.execute(f"PRAGMA {schema}.table_info(sensor_readings)")]
+        missing = [metric for metric in self.metrics if metric not in columns]
+        indexed = [row[2] for row in
+                   conn.execute(f"PRAGMA {schema}.index_info(idx_sensor_readings_device_ts)")]
+        if not missing and set(self.metrics) <= set(indexed):
+            return
+
+        print(f"Adding metric columns to {schema}: {', '.join(missing) or 'index only'}...")
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for metric in missing:
+                conn.execute(f"ALTER TABLE {schema}.sensor_readings ADD COLUMN {metric} REAL")
+            conn.execute(f"DROP INDEX IF EXISTS {schema}.idx_sensor_readings_device_ts")
+            self._create_readings_schema(conn, schema)
+
+    def _migrate_devices(self, conn: sqlite3.Connection, schema: str):
+        """
+        Schema 3: add device_id to sensor_readings in `schema` (main or a
+        shard), assigning existing rows to this node, and re-key the covering
+        index on (device_id, ts). For main, also add device_id to
+        sensor_rollups and create the devices and merge_sources tables.
+        """
+        columns = [row[1] for row in
+                   conn.execute(f"PRAGMA {schema}.table_info(sensor_readings)")]
+        # Tables created by this version's schema already have the column
+        if 'device_id' not in columns:
+            device = self.device_id.replace("'", "''")
+            conn.execute(f'''
+                ALTER TABLE {schema}.sensor_readings
+                ADD COLUMN device_id TEXT NOT NULL DEFAULT '{device}'
+            ''')
+        conn.execute(f"DROP INDEX IF EXISTS {schema}.idx_sensor_readings_ts")
+        self._create_readings_schema(conn, schema)
+
+        if schema == 'main':
+            conn.execute("ALTER TABLE sensor_rollups RENAME TO sensor_rollups_v2")
+            self._create_rollups_schema(conn)
+            conn.execute('''
+                INSERT INTO sensor_rollups
+                (device_id, resolution, metric, bucket, count, sum, min, max)
+                SELECT ?, resolution, metric, bucket, count, sum, min, max
+                FROM sensor_rollups_v2
+            ''', (self.device_id,))
+            conn.execute("DROP TABLE sensor_rollups_v2")
+
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS devices (
+                    device_id TEXT PRIMARY KEY,
+                    first_ts INTEGER NOT NULL,
+                    last_ts INTEGER NOT NULL
+                )
+            ''')
+            # High-water mark of each database file merge_from has read
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS merge_sources (
+                    source TEXT PRIMARY KEY,
+                    last_ts INTEGER NOT NULL,
+                    merged_at INTEGER NOT NULL
+                )
+            ''')
+
+        self._update_devices(conn, f"{schema}.sensor_readings")
+
+    def _migrate_history(self, conn: sqlite3.Connection):
+        """Schema 4: add river_readings and forecast_snapshots."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS river_readings (
+                site_id TEXT NOT NULL,
+                parameter TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY (site_id, parameter, ts)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS forecast_snapshots (
+                location TEXT NOT NULL,
+                issued_ts INTEGER NOT NULL,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL,
+                name TEXT,
                 temperature REAL,
-                humidity REAL,
-                pressure REAL,
-                gas_resistance REAL,
-                pm1 REAL,
-                pm25 REAL,
-                pm10 REAL
+                precipitation_chance REAL,
+                wind_speed TEXT,
+                wind_direction TEXT,
+                conditions TEXT,
+                PRIMARY KEY (location, issued_ts, start_ts)
+            ) WITHOUT ROWID
+        ''')
+        # Every forecast made for a period, for accuracy comparisons
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_forecast_snapshots_start
+            ON forecast_snapshots (location, start_ts, issued_ts)
+        ''')
+
+    def _migrate_settings(self, conn: sqlite3.Connection):
+        """Schema 5: add settings, which records the device_id this node logs as."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
             )
         ''')
 
-        conn.commit()
-        conn.close()
+    def _migrate_four_hour_rollups(self, conn: sqlite3.Connection):
+        """
+        Schema 6: add 4-hour rollups, so a month fits a graph's point cap at
+        better than daily resolution. They are summed from the hourly
+        rollups, which outlive the raw rows.
+        """
+        conn.execute('''
+            INSERT INTO sensor_rollups
+            (device_id, resolution, metric, bucket, count, sum, min, max)
+            SELECT device_id, 14400, metric, bucket / 14400 * 14400,
+                   SUM(count), SUM(sum), MIN(min), MAX(max)
+            FROM sensor_rollups
+            WHERE resolution = 3600
+            GROUP BY device_id, metric, bucket / 14400
+            ON CONFLICT (device_id, resolution, metric, bucket) DO NOTHING
+        ''')
+
+    def _recorded_device_id(self, version: int) -> Optional[str]:
+        """
+        device_id the file was last opened with, or None if unknown. Files
+        older than schema 5 didn't record it; there the sole device is
+        taken to be this node's unless other databases were merged in.
+        """
+        conn = self._writer
+        if version >= 5:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'device_id'").fetchone()
+            return row[0] if row else None
+        if version < 3 or conn.execute("SELECT 1 FROM merge_sources LIMIT 1").fetchone():
+            return None
+        devices = conn.execute("SELECT device_id FROM devices LIMIT 2").fetchall()
+        return devices[0][0] if len(devices) == 1 else None
 
-    def log_reading(self, temperature: float, humidity: float, pressure: float,
-                   gas_resistance: float, pm1: float, pm25: float, pm10: float):
-        """Insert a sensor reading into the database."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _claim_device_id(self, recorded: Optional[str]):
+        """
+        Record device_id as this node's. If the node was renamed, relabel
+        the readings and rollups of the recorded id so its history follows
+        it, unless the new id already has readings here, which would mix
+        two devices; then the old rows keep their id and a warning says so.
+        """
+        if recorded == self.device_id:
+            return
 
-        cursor.execute('''
-            INSERT INTO sensor_readings
-            (temperature, humidity, pressure, gas_resistance, pm1, pm25, pm10)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (temperature, humidity, pressure, gas_resistance, pm1, pm25, pm10))
+        conn = self._writer
+        if recorded is not None:
+            if conn.execute("SELECT 1 FROM devices WHERE device_id = ?",
+                            (self.device_id,)).fetchone():
+                print(f"Warning: device_id changed from '{recorded}' to "
+                      f"'{self.device_id}', which already has readings; older "
+                      f"readings stay under '{recorded}'")
+            else:
+                print(f"Relabelling readings of '{recorded}' as '{self.device_id}'...")
+                self._relabel_device(recorded, self.device_id)
 
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute('''
+                INSERT INTO settings (key, value) VALUES ('device_id', ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value
+            ''', (self.device_id,))
 
-    def get_readings(self, hours: int = 24) -> List[Tuple]:
+    def _relabel_device(self, old: str, new: str):
         """
-        Retrieve sensor readings from the last N hours.
-        Returns list of tuples: (timestamp, temp, humidity, pressure, gas, pm1, pm25, pm10)
+        Move every row of device `old` to `new`. Shards are done first, one
+        transaction each, so an interrupted relabel is redone on next open.
+        """
+        conn = self._writer
+        for key in self.shard_keys():
+            for name in self._attach_shards(conn, [key]):
+                with conn:
+                    conn.execute(f"UPDATE {name}.sensor_readings SET device_id = ? "
+                                 f"WHERE device_id = ?", (new, old))
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for table in ('sensor_readings', 'sensor_rollups', 'devices'):
+                conn.execute(f"UPDATE main.{table} SET device_id = ? WHERE device_id = ?",
+                             (new, old))
+
+    def _migrate_shards(self):
+        """
+        Bring shard files written by older versions up to schema 3 and give
+        them a column for every configured metric.
+        """
+        conn = self._writer
+        for key in self.shard_keys():
+            for name in self._attach_shards(conn, [key]):
+                columns = [row[1] for row in
+                           conn.execute(f"PRAGMA {name}.table_info(sensor_readings)")]
+                if 'device_id' not in columns:
+                    print(f"Adding device_id to shard {key}...")
+                    with conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        self._migrate_devices(conn, name)
+                self._add_metric_columns(conn, name)
+
+    def _update_devices(self, conn: sqlite3.Connection, source: str):
+        """Record the devices in `source` and widen their first/last ts."""
+        conn.execute(f'''
+            INSERT INTO devices (device_id, first_ts, last_ts)
+            SELECT device_id, MIN(ts), MAX(ts) FROM {source}
+            GROUP BY device_id
+            ON CONFLICT (device_id) DO UPDATE SET
+                first_ts = MIN(first_ts, excluded.first_ts),
+                last_ts = MAX(last_ts, excluded.last_ts)
+        ''')
+
+    def _shard_path(self, key: str) -> str:
+        """Path of the shard file for a shard key."""
+        return os.path.join(self.shard_dir, f"sensor_readings_{key}.db")
+
+    def shard_keys(self) -> List[str]:
+        """Keys of the shard files on disk, oldest first."""
+        pattern = os.path.join(self.shard_dir, "sensor_readings_*.db")
+        prefix = len("sensor_readings_")
+        return sorted(os.path.basename(path)[prefix:-3] for path in glob.glob(pattern))
+
+    def _shards_between(self, start: int, end: int) -> List[str]:
+        """Keys of existing shards overlapping [start, end], oldest first."""
+        keys = []
+        for key in self.shard_keys():
+            shard_start, shard_end = shard_bounds(key)
+            if shard_start <= end and shard_end > start:
+                keys.append(key)
+        return keys
+
+    def _attach_shards(self, conn: sqlite3.Connection, keys: Sequence[str],
+                       create: bool = False) -> List[str]:
+        """
+        Attach the shards for `keys` to conn as shard_<key>, detaching stale
+        or surplus ones first. Must run outside a transaction.
+        Returns the schema names that are attached. Raises OperationalError
+        if shards still in use by open cursors leave no room for `keys`.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+        wanted = {f"shard_{key}" for key in keys}
 
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        shards = [name for name in attached if name.startswith('shard_')]
+        surplus = len(set(shards) | wanted) > MAX_ATTACHED_SHARDS
+        for name in shards:
+            if name in wanted:
+                continue
+            # Files unlinked by prune() must be dropped even when not surplus
+            if surplus or not os.path.exists(self._shard_path(name[len('shard_'):])):
+                try:
+                    conn.execute(f"DETACH DATABASE {name}")
+                    attached.discard(name)
+                except sqlite3.OperationalError:
+                    pass  # Still in use by an open cursor; retry next time
 
-        cursor.execute('''
-            SELECT timestamp, temperature, humidity, pressure,
-                   gas_resistance, pm1, pm25, pm10
-            FROM sensor_readings
-            WHERE timestamp >= ?
-            ORDER BY timestamp ASC
-        ''', (cutoff_time,))
+        held = {name for name in attached if name.startswith('shard_')} - wanted
+        if len(held) + len(wanted) > MAX_ATTACHED_SHARDS:
+            raise sqlite3.OperationalError(
+                f"Cannot attach {len(wanted)} shards: {len(held)} others are still "
+                f"in use by open cursors on this connection")
 
-        results = cursor.fetchall()
-        conn.close()
+        names = []
+        for key in keys:
+            name = f"shard_{key}"
+            if name not in attached:
+                path = self._shard_path(key)
+                if not create and not os.path.exists(path):
+                    continue
+                conn.execute(f"ATTACH DATABASE ? AS {name}", (path,))
+                if create:
+                    conn.execute(f"PRAGMA {name}.journal_mode=WAL")
+                    conn.execute(f"PRAGMA {name}.synchronous={self.tuning.synchronous}")
+                    self._create_readings_schema(conn, name)
+            names.append(name)
+        return names
+
+    def _raw_sources(self, conn: sqlite3.Connection, start: int, end: int,
+                     columns: Sequence[str]) -> Iterator[str]:
+        """
+        Yield FROM-clause sources of (device_id, ts, <columns...>) rows covering
+        [start, end], oldest first. Unpartitioned databases yield the main
+        table once; partitioned ones yield a UNION ALL of main and each group
+        of overlapping shards, attached just before the group is yielded.
+        """
+        if not self.partition:
+            yield 'main.sensor_readings'
+            return
+
+        select = f"SELECT device_id, ts, {', '.join(columns)} FROM"
+        keys = self._shards_between(start, end)
+        groups = [keys[i:i + MAX_ATTACHED_SHARDS]
+                  for i in range(0, len(keys), MAX_ATTACHED_SHARDS)] or [[]]
+
+        for i, group in enumerate(groups):
+            # Rows logged before partitioning was enabled stay in main
+            tables = ['main.sensor_readings'] if i == 0 else []
+            tables += [f"{name}.sensor_readings" for name in self._attach_shards(conn, group)]
+            yield '(' + ' UNION ALL '.join(f"{select} {table}" for table in tables) + ')'
+
+    def _migrate_rollups(self, conn: sqlite3.Connection):
+        """
+        Schema 2: add sensor_rollups. _migrate backfills it from existing
+        rows after the later steps have run.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sensor_rollups (
+                id INTEGER PRIMARY KEY,
+                resolution INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                UNIQUE (resolution, metric, bucket)
+            )
+        ''')
 
-        return results
+    def _create_rollups_schema(self, conn: sqlite3.Connection):
+        """Create sensor_rollups, keyed so each device is one index range."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sensor_rollups (
+                id INTEGER PRIMARY KEY,
+                device_id TEXT NOT NULL,
+                resolution INTEGER NOT NULL,
+                metric TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                UNIQUE (device_id, resolution, metric, bucket)
+            )
+        ''')
 
-    def get_latest_reading(self) -> Optional[Tuple]:
-        """Get the most recent sensor reading."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _merge_rollups(self, conn: sqlite3.Connection, source: str,
+                       stats_source: Optional[str] = None):
+        """
+        Fold the rows of `source` (a table with device_id, ts and metric
+        columns) into sensor_rollups at every resolution in one statement.
+        stats_source is a table of (device_id, metric, ts, count, sum, min,
+        max) for readings that stand for many samples, merged alongside.
+        """
+        parts = [
+            f"SELECT device_id, '{column}' AS metric, ts, 1 AS count, {column} AS sum, "
+            f"{column} AS min, {column} AS max FROM {source} WHERE {column} IS NOT NULL"
+            for column in self.metrics
+        ]
+        if stats_source:
+            parts.append(f"SELECT device_id, metric, ts, count, sum, min, max FROM {stats_source}")
+        metrics = ' UNION ALL '.join(parts)
+        resolutions = ' UNION ALL '.join(
+            f"SELECT {resolution} AS resolution" for resolution in ROLLUP_RESOLUTIONS
+        )
 
-        cursor.execute('''
-            SELECT timestamp, temperature, humidity, pressure,
-                   gas_resistance, pm1, pm25, pm10
-            FROM sensor_readings
-            ORDER BY timestamp DESC
-            LIMIT 1
+        conn.execute(f'''
+            INSERT INTO sensor_rollups
+            (device_id, resolution, metric, bucket, count, sum, min, max)
+            SELECT m.device_id, r.resolution, m.metric,
+                   m.ts / r.resolution * r.resolution,
+                   SUM(m.count), SUM(m.sum), MIN(m.min), MAX(m.max)
+            FROM ({metrics}) AS m, ({resolutions}) AS r
+            GROUP BY m.device_id, r.resolution, m.metric, m.ts / r.resolution
+            ON CONFLICT (device_id, resolution, metric, bucket) DO UPDATE SET
+                count = count + excluded.count,
+                sum = sum + excluded.sum,
+                min = MIN(min, excluded.min),
+                max = MAX(max, excluded.max)
         ''')
 
-        result = cursor.fetchone()
-        conn.close()
+    def log_reading(self, *values: Optional[float], **named: Optional[float]) -> bool:
+        """
+        Queue a sensor reading from this device for the writer thread, which
+        group-commits the queue every tuning.batch_size rows or
+        tuning.flush_interval seconds. A full queue drops a reading per
+        tuning.overflow (or blocks up to put_timeout); get_stats() counts
+        drops. Range queries see the reading once written, get_latest_reading
+        straight away.
+
+        Values are given positionally in self.metrics order (temperature,
+        humidity, pressure, gas_resistance, pm1, pm25, pm10, then any added
+        metrics) or by metric name, e.g. log_reading(**sensor_reader.read());
+        metrics left out are stored as NULL.
+        Returns False if the reading was dropped because the queue was full.
+        """
+        if len(values) > len(self.metrics):
+            raise ValueError(f"Expected at most {len(self.metrics)} values, got {len(values)}")
+        reading = dict(zip(self.metrics, values))
+        if named:
+            self._check_metrics(list(named))
+            reading.update(named)
+
+        row = (int(time.time()), *(reading.get(metric) for metric in self.metrics),
+               self.device_id)
+        return self._enqueue(row)
+
+    def log_summary(self, summary: Dict, ts: Optional[Union[datetime, int, float]] = None) -> bool:
+        """
+        Queue the summary of a logging interval's high-rate samples, as made
+        by SampleBuffer.summarize(): {metric: MetricSummary(count, mean, min,
+        max, std)}. The raw row stores each mean; the rollups get the true
+        count, sum, min and max of the underlying samples. get_series and
+        bucket_stats notice windows holding such rows and answer them from
+        the 1-minute rollups, so transients survive. ts defaults to now.
+        Returns False if the summary was dropped because the queue was full.
+        """
+        self._check_metrics(list(summary))
+        stats = tuple((item.count, item.mean * item.count, item.min, item.max)
+                      if item is not None and item.count else None
+                      for item in (summary.get(metric) for metric in self.metrics))
+        means = (stat[1] / stat[0] if stat else None for stat in stats)
+
+        ts = int(time.time()) if ts is None else to_epoch(ts)
+        return self._enqueue((ts, *means, self.device_id, stats))
+
+    def _enqueue(self, row: Tuple) -> bool:
+        """Append a row to the writer queue, applying the overflow policy."""
+        with self._queue_cond:
+            if self._stopping:
+                return False
+
+            if len(self._queue) >= self.tuning.queue_size:
+                if self.tuning.overflow == 'drop_newest':
+                    self._stats['dropped'] += 1
+                    return False
+                if self.tuning.overflow == 'drop_oldest':
+                    self._queue.popleft()
+                    self._stats['dropped'] += 1
+                elif not self._queue_cond.wait_for(
+                        lambda: len(self._queue) < self.tuning.queue_size or self._stopping,
+                        timeout=self.tuning.put_timeout) or self._stopping:
+                    self._stats['dropped'] += 1
+                    return False
+
+            if self._queued_since is None:
+                self._queued_since = time.monotonic()
+            self._queue.append(row)
+            self._latest = row[:len(self.metrics) + 1]
+            # The writer re-arms its timer on the first row and wakes on a full batch
+            if len(self._queue) == 1 or len(self._queue) >= self.tuning.batch_size:
+                self._queue_cond.notify_all()
+        return True
+
+    def flush(self) -> int:
+        """
+        Block until everything queued so far has been written.
+        Returns the number of rows written by that pass.
+        """
+        with self._queue_cond:
+            if not self._writer_thread.is_alive():
+                return 0
+            self._flush_requested += 1
+            ticket = self._flush_requested
+            self._queue_cond.notify_all()
+            self._queue_cond.wait_for(
+                lambda: self._flush_served >= ticket or not self._writer_thread.is_alive())
+            return self._flush_written
+
+    def _writer_loop(self):
+        """Writer thread: drain the queue in group commits until stopped."""
+        retry = []
+        while True:
+            with self._queue_cond:
+                while True:
+                    pending = self._queued_since is not None
+                    waited = time.monotonic() - self._queued_since if pending else 0
+                    if (self._stopping or self._flush_requested > self._flush_served or
+                            len(self._queue) >= self.tuning.batch_size or
+                            (pending and waited >= self.tuning.flush_interval)):
+                        break
+                    self._queue_cond.wait(self.tuning.flush_interval - waited if pending else None)
+
+                rows = retry + list(self._queue)
+                self._queue.clear()
+                ticket = self._flush_requested
+                stopping = self._stopping
+                # Wake producers blocked on a full queue
+                self._queue_cond.notify_all()
+
+            written, retry = self._write_batches(rows)
+
+            # Rows that keep failing must not grow without bound
+            excess = len(retry) - self.tuning.queue_size
+            with self._queue_cond:
+                if excess > 0:
+                    retry = retry[excess:]
+                    self._stats['dropped'] += excess
+                if not retry and not self._queue:
+                    self._queued_since = None
+                elif self._queued_since is None:
+                    self._queued_since = time.monotonic()
+                self._flush_served = ticket
+                self._flush_written = written
+                self._queue_cond.notify_all()
+
+            if stopping:
+                if retry:
+                    print(f"Discarding {len(retry)} unwritten sensor readings")
+                return
+
+    def _write_batches(self, rows: List[Tuple]) -> Tuple[int, List[Tuple]]:
+        """
+        Write rows in one transaction (one per group of MAX_ATTACHED_SHARDS
+        shards when partitioned), recording latency stats.
+        Returns (rows written, rows left unwritten after an error).
+        """
+        if not rows:
+            return 0, []
+
+        written = 0
+        batches = self._shard_batches(rows)
+        for i, batch in enumerate(batches):
+            started = time.perf_counter()
+            try:
+                with self._write_lock:
+                    if self.partition:
+                        keys = sorted({shard_key(row[0], self.partition) for row in batch})
+                        self._attach_shards(self._writer, keys, create=True)
+                    with self._writer:
+                        self._write_rows(self._writer, batch)
+            except sqlite3.Error as e:
+                print(f"Error writing sensor readings: {e}")
+                with self._queue_cond:
+                    self._stats['errors'] += 1
+                # Keep the unwritten rows so the next pass retries them
+                return written, [row for rest in batches[i:] for row in rest]
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            written += len(batch)
+            self._record_write(min(row[0] for row in batch))
+            with self._queue_cond:
+                stats = self._stats
+                stats['rows_written'] += len(batch)
+                stats['batches_written'] += 1
+                stats['last_write_ms'] = elapsed_ms
+                stats['max_write_ms'] = max(stats['max_write_ms'], elapsed_ms)
+                stats['total_write_ms'] += elapsed_ms
+
+        return written, []
+
+    def get_stats(self) -> Dict:
+        """
+        Writer metrics: queue_depth, queue_size, rows_written,
+        batches_written, dropped, errors, and last/avg/max write latency (ms).
+        """
+        with self._queue_cond:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+        stats['queue_size'] = self.tuning.queue_size
+        total = stats.pop('total_write_ms')
+        stats['avg_write_ms'] = total / stats['batches_written'] if stats['batches_written'] else 0.0
+        return stats
+
+    def _shard_batches(self, rows: List[Tuple]) -> List[List[Tuple]]:
+        """
+        Split rows into batches touching at most MAX_ATTACHED_SHARDS shards,
+        each written in its own transaction. Unpartitioned: one batch.
+        """
+        if not self.partition:
+            return [rows]
+
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(shard_key(row[0], self.partition), []).append(row)
+
+        keys = sorted(by_key)
+        return [[row for key in keys[i:i + MAX_ATTACHED_SHARDS] for row in by_key[key]]
+                for i in range(0, len(keys), MAX_ATTACHED_SHARDS)]
+
+    def _write_rows(self, conn: sqlite3.Connection, rows: List[Tuple],
+                    dedupe: bool = False) -> int:
+        """
+        Insert (ts, <self.metrics...>, device_id) rows and merge them into
+        the rollups. Runs inside the caller's transaction; when partitioned,
+        the rows' shards must already be attached.
+
+        Rows queued by log_summary carry a trailing tuple of per-metric
+        (count, sum, min, max) that is merged into the rollups instead of
+        the stored means.
+
+        With dedupe, rows whose (device_id, ts) is repeated in the batch or
+        already stored are skipped. Returns the number of rows inserted.
+        """
+        metrics = ', '.join(self.metrics)
+        conn.execute(f'''
+            CREATE TEMP TABLE IF NOT EXISTS pending_readings (
+                ts INTEGER, {', '.join(f"{metric} REAL" for metric in self.metrics)},
+                device_id TEXT
+            )
+        ''')
+        width = len(self.metrics) + 2
+        conn.executemany(f'''
+            INSERT INTO temp.pending_readings
+            (ts, {metrics}, device_id)
+            VALUES ({', '.join('?' * width)})
+        ''', [row[:width] for row in rows])
+
+        summaries = [(row[-2], metric, row[0], *stat)
+                     for row in rows if len(row) > width
+                     for metric, stat in zip(self.metrics, row[-1]) if stat]
+        if summaries:
+            conn.execute('''
+                CREATE TEMP TABLE IF NOT EXISTS pending_stats (
+                    device_id TEXT, metric TEXT, ts INTEGER,
+                    count INTEGER, sum REAL, min REAL, max REAL
+                )
+            ''')
+            conn.executemany(
+                "INSERT INTO temp.pending_stats VALUES (?, ?, ?, ?, ?, ?, ?)", summaries)
+
+        if self.partition:
+            keys = {shard_key(row[0], self.partition) for row in rows}
+            targets = [(f"shard_{key}", shard_bounds(key)) for key in sorted(keys)]
+        else:
+            targets = [('main', (0, 2 ** 62))]
+
+        count = len(rows)
+        if dedupe:
+            conn.execute('''
+                DELETE FROM temp.pending_readings WHERE rowid NOT IN (
+                    SELECT MIN(rowid) FROM temp.pending_readings GROUP BY device_id, ts
+                )
+            ''')
+            # Pre-partition rows in main count as stored too
+            schemas = {'main'} | {schema for schema, _ in targets}
+            for schema in sorted(schemas):
+                conn.execute(f'''
+                    DELETE FROM temp.pending_readings WHERE EXISTS (
+                        SELECT 1 FROM {schema}.sensor_readings AS stored
+                        WHERE stored.device_id = temp.pending_readings.device_id
+                          AND stored.ts = temp.pending_readings.ts
+                    )
+                ''')
+            count = conn.execute("SELECT COUNT(*) FROM temp.pending_readings").fetchone()[0]
+
+        for schema, (start, end) in targets:
+            conn.execute(f'''
+                INSERT INTO {schema}.sensor_readings
+                (device_id, ts, {metrics})
+                SELECT device_id, ts, {metrics}
+                FROM temp.pending_readings
+                WHERE ts >= ? AND ts < ?
+            ''', (start, end))
+        self._update_devices(conn, 'temp.pending_readings')
+        if summaries:
+            # Summarized rows reach the rollups through their sample stats
+            conn.execute('''
+                DELETE FROM temp.pending_readings WHERE EXISTS (
+                    SELECT 1 FROM temp.pending_stats AS stats
+                    WHERE stats.device_id = temp.pending_readings.device_id
+                      AND stats.ts = temp.pending_readings.ts
+                )
+            ''')
+            self._merge_rollups(conn, 'temp.pending_readings', 'temp.pending_stats')
+            conn.execute("DELETE FROM temp.pending_stats")
+        else:
+            self._merge_rollups(conn, 'temp.pending_readings')
+        conn.execute("DELETE FROM temp.pending_readings")
+        return count
+
+    def import_rows(self, rows: Iterable, chunk_size: int = 50000) -> Dict[str, int]:
+        """
+        Bulk-insert historical readings, e.g. from a second logger or a CSV
+        dump, bypassing the writer queue.
+
+        rows yields (ts, <self.metrics...>) sequences, optionally followed
+        by a device_id, or dicts keyed by 'ts'
+        (or 'timestamp'), metric name and optionally 'device_id'; ts may be
+        epoch seconds or a datetime, and device_id defaults to this device.
+        Rows are written chunk_size at a time, one transaction per chunk,
+        skipping any (device_id, ts) that is already stored or repeated.
+        Rollups are merged from the inserted rows only.
+        Returns dict: {'inserted': n, 'skipped': n}
+        """
+        totals = {'inserted': 0, 'skipped': 0}
+        chunk = []
+        for row in rows:
+            chunk.append(self._normalize_row(row))
+            if len(chunk) >= chunk_size:
+                self._import_chunk(chunk, totals)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk, totals)
+        return totals
+
+    def _normalize_row(self, row) -> Tuple:
+        """Convert an import row to a (ts, <self.metrics...>, device_id) tuple."""
+        if isinstance(row, dict):
+            ts = row['ts'] if 'ts' in row else row['timestamp']
+            return (to_epoch(ts), *(row.get(metric) for metric in self.metrics),
+                    row.get('device_id') or self.device_id)
+
+        width = len(self.metrics) + 1
+        if len(row) == width:
+            return (to_epoch(row[0]), *row[1:], self.device_id)
+        if len(row) != width + 1:
+            raise ValueError(f"Expected {width} or {width + 1} values, got {len(row)}")
+        return (to_epoch(row[0]), *row[1:])
+
+    def _import_chunk(self, chunk: List[Tuple], totals: Dict[str, int]):
+        """Write one import chunk, one transaction per shard batch."""
+        for batch in self._shard_batches(chunk):
+            with self._write_lock:
+                if self.partition:
+                    keys = sorted({shard_key(row[0], self.partition) for row in batch})
+                    self._attach_shards(self._writer, keys, create=True)
+                with self._writer:
+                    inserted = self._write_rows(self._writer, batch, dedupe=True)
 
+            totals['inserted'] += inserted
+            totals['skipped'] += len(batch) - inserted
+            if inserted:
+                self._record_write(min(row[0] for row in batch))
+
+    def _record_write(self, oldest_ts: int):
+        """Bump the data version so cached series notice new rows."""
+        with self._queue_cond:
+            self._data_version += 1
+            self._write_log.append((self._data_version, oldest_ts))
+
+    def merge_from(self, path: str, device: Optional[str] = None, full: bool = False,
+                   chunk_size: int = 50000) -> Dict[str, int]:
+        """
+        Merge another node's database file, plus its <name>_shards directory
+        if it is partitioned, into this database.
+
+        Only rows at or after the newest ts seen by the previous merge of
+        `path` are read, so repeated merges are incremental; full=True
+        rescans the whole file. Rows already stored are skipped, so the
+        overlap is harmless. `device` labels every merged row, which is
+        required for files that predate device_id and for nodes that use the
+        same device_id as this one.
+        Returns dict: {'inserted': n, 'skipped': n}
+        """
+        source = os.path.abspath(path)
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"No such database: {source}")
+        if source == os.path.abspath(self.db_path):
+            raise ValueError("Cannot merge a database into itself")
+
+        since = None
+        if not full:
+            row = self._reader().execute(
+                "SELECT last_ts FROM merge_sources WHERE source = ?", (source,)).fetchone()
+            since = row[0] if row else None
+
+        files = [source]
+        shard_dir = os.path.splitext(source)[0] + "_shards"
+        for shard in sorted(glob.glob(os.path.join(shard_dir, "sensor_readings_*.db"))):
+            key = os.path.basename(shard)[len("sensor_readings_"):-3]
+            if since is None or shard_bounds(key)[1] > since:
+                files.append(shard)
+
+        totals = {'inserted': 0, 'skipped': 0}
+        newest = since
+        for file in files:
+            for chunk in self._source_chunks(file, since, device, chunk_size):
+                newest = max(newest or 0, max(row[0] for row in chunk))
+                self._import_chunk(chunk, totals)
+
+        if newest is not None:
+            with self._write_lock:
+                with self._writer:
+                    self._writer.execute('''
+                        INSERT INTO merge_sources (source, last_ts, merged_at)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (source) DO UPDATE SET
+                            last_ts = excluded.last_ts,
+                            merged_at = excluded.merged_at
+                    ''', (source, newest, int(time.time())))
+        return totals
+
+    def _source_chunks(self, path: str, since: Optional[int], device: Optional[str],
+                       chunk_size: int) -> Iterator[List[Tuple]]:
+        """
+        Yield (ts, <self.metrics...>, device_id) rows with ts >= since
+        from another node's database file, opened read-only, chunk_size at
+        a time. Handles every schema version's sensor_readings; metrics the
+        source doesn't have are NULL.
+        """
+        conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True)
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sensor_readings)")]
+            if not columns:
+                return
+
+            # Schema 0 stored CURRENT_TIMESTAMP text (UTC)
+            ts = 'ts' if 'ts' in columns else "CAST(strftime('%s', timestamp) AS INTEGER)"
+            values = ', '.join(metric if metric in columns else 'NULL'
+                               for metric in self.metrics)
+            if device is not None:
+                label, params = '?', (device,)
+            elif 'device_id' not in columns:
+                raise ValueError(f"{path} predates device_id; pass a device to label it")
+            elif conn.execute("SELECT 1 FROM sensor_readings WHERE device_id = ? LIMIT 1",
+                              (self.device_id,)).fetchone():
+                raise ValueError(f"{path} also logs as device '{self.device_id}'; "
+                                 f"pass a device to relabel it")
+            else:
+                label, params = 'device_id', ()
+
+            cursor = conn.execute(f'''
+                SELECT {ts}, {values}, {label}
+                FROM sensor_readings
+                WHERE {ts} >= ?
+            ''', params + (since or 0,))
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    def get_readings(self, hours: int = 24, device: Optional[str] = None) -> List[Tuple]:
+        """
+        Retrieve sensor readings from the last N hours.
+        Returns list of tuples: (ts, <self.metrics...>), i.e. (ts, temp,
+        humidity, pressure, gas, pm1, pm25, pm10, ...) where ts is integer
+        epoch seconds.
+        """
+        end = int(time.time())
+        return self.get_readings_between(end - int(hours * 3600), end, device)
+
+    def get_readings_between(self, start: Union[datetime, int, float],
+                             end: Union[datetime, int, float],
+                             device: Optional[str] = None) -> List[Tuple]:
+        """
+        Retrieve sensor readings with start <= ts <= end, oldest first.
+        Bounds may be epoch seconds or datetimes (naive means local time).
+        device defaults to this node.
+        """
+        return self._select_raw(self.metrics, to_epoch(start), to_epoch(end),
+                                [device or self.device_id])
+
+    def device_ids(self) -> List[str]:
+        """Every device with readings in this database, sorted."""
+        rows = self._reader().execute("SELECT device_id FROM devices ORDER BY device_id")
+        return [row[0] for row in rows]
+
+    def _select_raw(self, columns: Sequence[str], start: int, end: int,
+                    devices: Sequence[str], extra_where: str = '',
+                    with_device: bool = False) -> List[Tuple]:
+        """
+        Fetch (ts, <columns...>) raw rows in [start, end] for `devices`,
+        oldest first per device; with_device prefixes each row with its
+        device_id.
+        """
+        conn = self._reader()
+        select = 'device_id, ts' if with_device else 'ts'
+        placeholders = ', '.join('?' * len(devices))
+        rows = []
+        for source in self._raw_sources(conn, start, end, columns):
+            rows += conn.execute(f'''
+                SELECT {select}, {', '.join(columns)}
+                FROM {source}
+                WHERE device_id IN ({placeholders}) AND ts BETWEEN ? AND ? {extra_where}
+                ORDER BY device_id, ts ASC
+            ''', (*devices, start, end)).fetchall()
+        return rows
+
+    def get_columns(self, metrics: Sequence[str], start: Union[datetime, int, float],
+                    end: Union[datetime, int, float],
+                    device: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Retrieve raw readings over [start, end] as NumPy columns.
+
+        Windows the `recent` ring buffer covers are sliced from memory;
+        otherwise only the requested metric columns are selected. Returns dict with
+        'ts' (int64 epoch seconds, ascending) plus one float64 array per
+        metric, with NaN where a value is missing.
+        """
+        metrics = self._check_metrics(metrics)
+        start, end = to_epoch(start), to_epoch(end)
+        device = device or self.device_id
+        if device == self.device_id and self.recent.covers(start):
+            return self.recent.window(start, end, metrics)
+
+        rows = self._select_raw(metrics, start, end, [device])
+        return self._rows_to_columns(rows, metrics)
+
+    @staticmethod
+    def _rows_to_columns(rows: List[Tuple], metrics: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Convert (ts, <metrics...>) rows to a dict of NumPy columns."""
+        # float64 conversion maps NULL (None) to NaN in one pass
+        data = np.array(rows, dtype=np.float64).reshape(-1, len(metrics) + 1)
+
+        columns = {'ts': data[:, 0].astype(np.int64)}
+        for i, metric in enumerate(metrics, start=1):
+            columns[metric] = data[:, i].copy()
+        return columns
+
+    def iter_readings(self, start: Union[datetime, int, float],
+                      end: Union[datetime, int, float], batch_size: int = 1000,
+                      metrics: Optional[Sequence[str]] = None,
+                      as_arrays: bool = False, device: Optional[str] = None) -> Iterator:
+        """
+        Stream readings over [start, end], oldest first, in constant memory.
+
+        Rows are pulled from an open cursor batch_size at a time. Yields
+        tuples (ts, <metrics...>) or, with as_arrays=True, one get_columns-
+        style dict of NumPy arrays per batch. metrics defaults to all columns.
+
+        It reads on a connection of its own, so the shards it holds attached
+        never crowd out other queries on this thread. The cursor holds a read
+        snapshot until the generator is exhausted or closed, which keeps the
+        WAL from being checkpointed past it, so consume it promptly (or
+        close() it) rather than parking it.
+        """
+        metrics = self._check_metrics(metrics or self.metrics)
+        start, end = to_epoch(start), to_epoch(end)
+        device = device or self.device_id
+        if self._closed:
+            raise sqlite3.ProgrammingError("SensorDatabase is closed")
+
+        conn = self._connect()
+        conn.execute("PRAGMA query_only=ON")
+        with self._readers_lock:
+            self._readers.append(conn)
+        try:
+            for source in self._raw_sources(conn, start, end, metrics):
+                cursor = conn.execute(f'''
+                    SELECT ts, {', '.join(metrics)}
+                    FROM {source}
+                    WHERE device_id = ? AND ts BETWEEN ? AND ?
+                    ORDER BY ts ASC
+                ''', (device, start, end))
+                try:
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+
+                        if as_arrays:
+                            yield self._rows_to_columns(rows, metrics)
+                        else:
+                            yield from rows
+                finally:
+                    try:
+                        cursor.close()
+                    except sqlite3.ProgrammingError:
+                        pass  # close() already closed the connection
+        finally:
+            with self._readers_lock:
+                if conn in self._readers:
+                    self._readers.remove(conn)
+            conn.close()
+
+    def _check_metrics(self, metrics: Union[str, Sequence[str]]) -> List[str]:
+        """Validate metric names before they are interpolated into SQL."""
+        if isinstance(metrics, str):
+            metrics = [metrics]
+        unknown = [metric for metric in metrics if metric not in self.metrics]
+        if unknown or not metrics:
+            raise ValueError(f"Unknown metrics: {unknown or metrics}")
+        return list(metrics)
+
+    def get_series(self, metric: str, start: Union[datetime, int, float],
+                   end: Union[datetime, int, float], max_points: int = 500,
+                   device: Optional[str] = None) -> List[Tuple]:
+        """
+        Retrieve one metric over [start, end] with at most about max_points rows.
+
+        Raw readings are returned when the window holds few enough of them;
+        otherwise the finest rollup resolution that fits is used, so a year
+        costs the same as a day. Returns list of tuples (ts, avg, min, max),
+        oldest first; raw rows have avg == min == max.
+        """
+        metric = self._check_metrics(metric)[0]
+        return self._series(metric, to_epoch(start), to_epoch(end), max_points,
+                            device or self.device_id)[1]
+
+    def get_fleet_series(self, metric: str, start: Union[datetime, int, float],
+                         end: Union[datetime, int, float],
+                         devices: Optional[Sequence[str]] = None,
+                         max_points: int = 500) -> Dict[str, List[Tuple]]:
+        """
+        get_series for several devices (default: all) in one query.
+
+        Every device is answered at the same resolution so the series line
+        up. Returns dict: {device_id: [(ts, avg, min, max), ...]}
+        """
+        metric = self._check_metrics(metric)[0]
+        start, end = to_epoch(start), to_epoch(end)
+        devices = list(devices) if devices is not None else self.device_ids()
+        result = {device: [] for device in devices}
+        if not devices:
+            return result
+
+        resolution = self._series_resolution(metric, start, end, max_points, devices)
+        if resolution is None:
+            for device, *row in self._raw_rows(metric, start, end, devices):
+                result[device].append(tuple(row))
+        else:
+            for device, *row in self._rollup_rows(metric, resolution, start, end, devices):
+                result[device].append(tuple(row))
+        return result
+
+    def _series(self, metric: str, start: int, end: int, max_points: int,
+                device: str) -> Tuple[Optional[int], List[Tuple]]:
+        """get_series body; also returns the resolution used (None = raw)."""
+        resolution = self._series_resolution(metric, start, end, max_points, [device])
+        if resolution is None:
+            return None, self._raw_series(metric, start, end, device)
+        return resolution, self._rollup_series(metric, resolution, start, end, device)
+
+    def _series_resolution(self, metric: str, start: int, end: int, max_points: int,
+                           devices: Sequence[str]) -> Optional[int]:
+        """
+        Resolution get_series uses for [start, end]: None (raw) if no device
+        has more than max_points readings there, else a rollup width.
+        """
+        conn = self._reader()
+
+        raw_count = 0
+        for device in devices:
+            raw_count = 0
+            for source in self._raw_sources(conn, start, end, [metric]):
+                raw_count += conn.execute(f'''
+                    SELECT COUNT(*) FROM (
+                        SELECT 1 FROM {source}
+                        WHERE device_id = ? AND ts BETWEEN ? AND ? LIMIT ?
+                    )
+                ''', (device, start, end, max_points + 1)).fetchone()[0]
+                if raw_count > max_points:
+                    break
+            if raw_count > max_points:
+                break
+
+        if raw_count <= max_points and self._retained('raw', start):
+            # Summarized rows only hold means; their minutes keep the extremes
+            if self._summarized(metric, start, end, devices):
+                return ROLLUP_RESOLUTIONS[0]
+            return None
+
+        # Finest resolution that fits and still covers start after pruning
+        span = max(end - start, 1)
+        for candidate in ROLLUP_RESOLUTIONS:
+            if span / candidate <= max_points and self._retained(candidate, start):
+                return candidate
+        return ROLLUP_RESOLUTIONS[-1]
+
+    def _summarized(self, metric: str, start: int, end: int, devices: Sequence[str]) -> bool:
+        """
+        Whether [start, end] holds rows written by log_summary, detected as
+        the finest rollups counting more samples than there are raw rows.
+        Only whole buckets are compared, so neighbours can't skew it.
+        """
+        resolution = ROLLUP_RESOLUTIONS[0]
+        low = -(-start // resolution) * resolution
+        high = (end + 1) // resolution * resolution
+        if low >= high or not self._retained(resolution, start):
+            return False
+
+        conn = self._reader()
+        placeholders = ', '.join('?' * len(devices))
+        samples = conn.execute(f'''
+            SELECT COALESCE(SUM(count), 0) FROM sensor_rollups
+            WHERE device_id IN ({placeholders}) AND resolution = ? AND metric = ?
+              AND bucket >= ? AND bucket < ?
+        ''', (*devices, resolution, metric, low, high)).fetchone()[0]
+        rows = 0
+        for source in self._raw_sources(conn, low, high - 1, [metric]):
+            rows += conn.execute(f'''
+                SELECT COUNT(*) FROM {source}
+                WHERE device_id IN ({placeholders}) AND ts >= ? AND ts < ?
+                  AND {metric} IS NOT NULL
+            ''', (*devices, low, high)).fetchone()[0]
+        return samples > rows
+
+    def _raw_series(self, metric: str, start: int, end: int, device: str) -> List[Tuple]:
+        """Raw (ts, value, value, value) rows for one metric of one device."""
+        return [row[1:] for row in self._raw_rows(metric, start, end, [device])]
+
+    def _raw_rows(self, metric: str, start: int, end: int,
+                  devices: Sequence[str]) -> List[Tuple]:
+        """Raw (device_id, ts, value, value, value) rows for one metric."""
+        rows = self._select_raw([metric], start, end, devices,
+                                f"AND {metric} IS NOT NULL", with_device=True)
+        return [(device, ts, value, value, value) for device, ts, value in rows]
+
+    def _rollup_series(self, metric: str, resolution: int, start: int,
+                       end: int, device: str) -> List[Tuple]:
+        """(bucket, avg, min, max) rows for buckets overlapping [start, end]."""
+        return [row[1:] for row in
+                self._rollup_rows(metric, resolution, start, end, [device])]
+
+    def _rollup_rows(self, metric: str, resolution: int, start: int, end: int,
+                     devices: Sequence[str]) -> List[Tuple]:
+        """(device_id, bucket, avg, min, max) rows, oldest first per device."""
+        placeholders = ', '.join('?' * len(devices))
+        cursor = self._reader().execute(f'''
+            SELECT device_id, bucket, sum / count, min, max
+            FROM sensor_rollups
+            WHERE device_id IN ({placeholders}) AND resolution = ? AND metric = ?
+              AND bucket BETWEEN ? AND ?
+            ORDER BY device_id, bucket ASC
+        ''', (*devices, resolution, metric, start - start % resolution, end))
+        return cursor.fetchall()
+
+    def bucket_stats(self, metric: str, start: Union[datetime, int, float],
+                     end: Union[datetime, int, float], bucket_seconds: int,
+                     device: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Aggregate one metric over [start, end] into bucket_seconds-wide
+        buckets (aligned to the epoch, like the rollups) inside SQLite.
+
+        Returns dict of NumPy arrays, one entry per non-empty bucket: 'ts'
+        (bucket start), 'count', 'min', 'avg', 'max' and 'p95'. While raw
+        readings are retained, p95 is the nearest-rank 95th percentile of
+        the bucket's readings. Older windows, and windows holding log_summary
+        rows (whose raw row is only a mean), are answered from the finest
+        retained rollup that divides bucket_seconds, and p95 is then taken
+        over those sub-bucket averages, which understates short spikes.
+        """
+        metric = self._check_metrics(metric)[0]
+        start, end = to_epoch(start), to_epoch(end)
+        device = device or self.device_id
+        bucket_seconds = int(bucket_seconds)
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+
+        resolution = None
+        if (not self._retained('raw', start)
+                or self._summarized(metric, start, end, [device])):
+            fits = [candidate for candidate in ROLLUP_RESOLUTIONS
+                    if bucket_seconds % candidate == 0 and self._retained(candidate, start)]
+            resolution = fits[0] if fits else None
+
+        if resolution is None:
+            rows = self._raw_bucket_stats(metric, start, end, bucket_seconds, device)
+        else:
+            rows = self._rollup_bucket_stats(metric, resolution, start, end,
+                                             bucket_seconds, device)
+
+        data = np.array(rows, dtype=np.float64).reshape(-1, 6)
+        return {
+            'ts': data[:, 0].astype(np.int64),
+            'count': data[:, 1].astype(np.int64),
+            'min': data[:, 2].copy(),
+            'avg': data[:, 3].copy(),
+            'max': data[:, 4].copy(),
+            'p95': data[:, 5].copy(),
+        }
+
+    def _raw_bucket_stats(self, metric: str, start: int, end: int, bucket_seconds: int,
+                          device: str) -> List[Tuple]:
+        """(bucket, count, min, avg, max, p95) rows computed from raw readings."""
+        conn = self._reader()
+        rows = []
+        for source in self._raw_sources(conn, start, end, [metric]):
+            rows += conn.execute(f'''
+                WITH ranked AS (
+                    SELECT ts / :width AS bucket, {metric} AS value,
+                           ROW_NUMBER() OVER (PARTITION BY ts / :width ORDER BY {metric}) AS rank,
+                           COUNT(*) OVER (PARTITION BY ts / :width) AS n
+                    FROM {source}
+                    WHERE device_id = :device AND ts BETWEEN :start AND :end
+                      AND {metric} IS NOT NULL
+                )
+                SELECT bucket * :width, COUNT(*), MIN(value), AVG(value), MAX(value),
+                       MIN(CASE WHEN rank >= 0.95 * n THEN value END)
+                FROM ranked
+                GROUP BY bucket
+                ORDER BY bucket ASC
+            ''', {'width': bucket_seconds, 'device': device,
+                  'start': start, 'end': end}).fetchall()
+        return self._merge_bucket_rows(rows)
+
+    def _rollup_bucket_stats(self, metric: str, resolution: int, start: int, end: int,
+                             bucket_seconds: int, device: str) -> List[Tuple]:
+        """(bucket, count, min, avg, max, p95) rows computed from rollups."""
+        cursor = self._reader().execute('''
+            WITH ranked AS (
+                SELECT bucket / :width AS outer_bucket, count, sum, min, max,
+                       sum / count AS mean,
+                       ROW_NUMBER() OVER (PARTITION BY bucket / :width ORDER BY sum / count) AS rank,
+                       COUNT(*) OVER (PARTITION BY bucket / :width) AS n
+                FROM sensor_rollups
+                WHERE device_id = :device AND resolution = :resolution
+                  AND metric = :metric AND bucket BETWEEN :start AND :end
+            )
+            SELECT outer_bucket * :width, SUM(count), MIN(min), SUM(sum) / SUM(count),
+                   MAX(max), MIN(CASE WHEN rank >= 0.95 * n THEN mean END)
+            FROM ranked
+            GROUP BY outer_bucket
+            ORDER BY outer_bucket ASC
+        ''', {'width': bucket_seconds, 'device': device, 'resolution': resolution,
+              'metric': metric, 'start': start - start % resolution, 'end': end})
+        return cursor.fetchall()
+
+    @staticmethod
+    def _merge_bucket_rows(rows: List[Tuple]) -> List[Tuple]:
+        """
+        Combine bucket rows split across shard groups by _raw_sources.
+        Merged buckets keep the larger p95, an upper-bound approximation.
+        """
+        merged = []
+        for row in rows:
+            if merged and merged[-1][0] == row[0]:
+                bucket, count, low, avg, high, p95 = merged[-1]
+                total = count + row[1]
+                merged[-1] = (bucket, total, min(low, row[2]),
+                              (avg * count + row[3] * row[1]) / total,
+                              max(high, row[4]), max(p95, row[5]))
+            else:
+                merged.append(row)
+        return merged
+
+    def get_recent_series(self, metric: str, seconds: int, max_points: int = 500,
+                          device: Optional[str] = None) -> List[Tuple]:
+        """
+        get_series for the trailing window [now - seconds, now], served from
+        a small LRU cache keyed by (device, metric, window, max_points).
+
+        A cached result is reused as-is until new rows are written. After a
+        write, only the rows (or rollup buckets) from the cached tail onward
+        are re-read and appended; older rows are trimmed as the window
+        slides. Writes that land before the cached tail, such as imports,
+        force a full re-query. Windows the `recent` ring buffer covers are
+        answered from memory without touching the cache or SQLite.
+        """
+        metric = self._check_metrics(metric)[0]
+        device = device or self.device_id
+        end = int(time.time())
+        start = end - int(seconds)
+        if device == self.device_id and self.recent.covers(start):
+            return self.recent.series(metric, start, end, max_points)
+
+        key = (device, metric, int(seconds), max_points)
+
+        with self._cache_lock:
+            entry = self._cache.pop(key, None)
+            with self._queue_cond:
+                version = self._data_version
+                floor = self._written_since(entry['version']) if entry else None
+
+            if entry and version != entry['version']:
+                rows, resolution = entry['rows'], entry['resolution']
+                tail = rows[-1][0] if rows else start
+                if floor is None or floor < tail:
+                    entry = None
+                elif resolution is None:
+                    rows = rows[:bisect_left(rows, tail, key=lambda row: row[0])]
+                    rows += self._raw_series(metric, tail, end, device)
+                    # Too many points now: let _series pick a rollup instead
+                    entry = None if len(rows) > max_points else entry
+                else:
+                    rows = rows[:bisect_left(rows, tail, key=lambda row: row[0])]
+                    rows += self._rollup_series(metric, resolution, tail, end, device)
+
+                if entry:
+                    entry = {'rows': rows, 'resolution': resolution, 'version': version}
+
+            if entry is None:
+                resolution, rows = self._series(metric, start, end, max_points, device)
+                entry = {'rows': rows, 'resolution': resolution, 'version': version}
+
+            # Slide the window start forward
+            rows, resolution = entry['rows'], entry['resolution']
+            cutoff = start if resolution is None else start - start % resolution
+            entry['rows'] = rows[bisect_left(rows, cutoff, key=lambda row: row[0]):]
+
+            self._cache[key] = entry
+            while len(self._cache) > self.tuning.cache_size:
+                self._cache.popitem(last=False)
+
+            return list(entry['rows'])
+
+    def _written_since(self, version: int) -> Optional[int]:
+        """
+        Oldest ts written after data version `version`, or None if the write
+        log no longer reaches back that far. Caller holds _queue_cond.
+        """
+        if self._write_log and self._write_log[0][0] > version + 1:
+            return None
+        floors = [floor for logged, floor in self._write_log if logged > version]
+        return min(floors) if floors else 2 ** 62
+
+    def _retained(self, table_key, start: int) -> bool:
+        """Whether data at `start` is still kept for 'raw' or a resolution."""
+        keep = self.retention.get(table_key)
+        return keep is None or start >= time.time() - keep
+
+    def prune(self, batch_size: int = 500, pause: float = 0.05,
+              vacuum_pages: int = 256) -> Dict:
+        """
+        Delete rows older than the retention policy, then return freed pages
+        to the filesystem with an incremental vacuum.
+
+        Work is done in transactions of at most batch_size rows (or
+        vacuum_pages pages) with `pause` seconds between them, so the write
+        lock is never held long enough to stall the sensor loop.
+        When partitioned, raw retention unlinks whole shards once their
+        period has fully expired instead of deleting rows from them.
+        Returns dict: {'raw': rows, <resolution>: rows, 'pages': pages}
+        plus 'shards': files removed when partitioned.
+        """
+        now = int(time.time())
+        deleted = {}
+        # One device at a time keeps each batch an index range scan
+        devices = self.device_ids()
+
+        keep = self.retention.get('raw')
+        if keep is not None and self.partition:
+            deleted['shards'] = self._drop_shards(now - keep)
+        if keep is not None:
+            deleted['raw'] = 0
+            for device in devices:
+                deleted['raw'] += self._delete_batched('''
+                    DELETE FROM sensor_readings WHERE id IN (
+                        SELECT id FROM sensor_readings
+                        WHERE device_id = ? AND ts < ? ORDER BY ts LIMIT ?
+                    )
+                ''', (device, now - keep), batch_size, pause)
+
+        for resolution in ROLLUP_RESOLUTIONS:
+            keep = self.retention.get(resolution)
+            if keep is None:
+                continue
+            deleted[resolution] = 0
+            for device in devices:
+                for metric in self.metrics:
+                    deleted[resolution] += self._delete_batched('''
+                        DELETE FROM sensor_rollups WHERE id IN (
+                            SELECT id FROM sensor_rollups
+                            WHERE device_id = ? AND resolution = ? AND metric = ?
+                              AND bucket < ?
+                            LIMIT ?
+                        )
+                    ''', (device, resolution, metric, now - keep), batch_size, pause)
+
+        deleted['pages'] = self._incremental_vacuum(vacuum_pages, pause)
+        return deleted
+
+    def _drop_shards(self, cutoff: int) -> int:
+        """Unlink shards whose whole period ends at or before cutoff."""
+        dropped = 0
+        for key in self.shard_keys():
+            if shard_bounds(key)[1] > cutoff:
+                break
+
+            with self._write_lock:
+                # Reader connections notice the missing file and detach it
+                try:
+                    self._writer.execute(f"DETACH DATABASE shard_{key}")
+                except sqlite3.OperationalError:
+                    pass  # Not attached
+                path = self._shard_path(key)
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
+            dropped += 1
+        return dropped
+
+    def _delete_batched(self, sql: str, params: Tuple, batch_size: int,
+                        pause: float) -> int:
+        """Run a DELETE (whose last parameter is LIMIT) until nothing is left."""
+        total = 0
+        while not self._closed:
+            with self._write_lock:
+                with self._writer:
+                    count = self._writer.execute(sql, params + (batch_size,)).rowcount
+            total += count
+            if count < batch_size:
+                break
+            time.sleep(pause)
+        return total
+
+    def _incremental_vacuum(self, pages: int, pause: float) -> int:
+        """Release free pages in chunks; returns the number released."""
+        total = 0
+        while not self._closed:
+            with self._write_lock:
+                free = self._writer.execute("PRAGMA freelist_count").fetchone()[0]
+                if free == 0:
+                    break
+                # executescript steps the pragma to completion; execute()
+                # would stop after the first page
+                self._writer.executescript(f"PRAGMA incremental_vacuum({int(pages)})")
+            total += min(free, pages)
+            time.sleep(pause)
+        return total
+
+    def backup(self, dest_dir: str, pages: int = 256, pause: float = 0.05,
+               incremental: bool = True, verify: bool = True) -> Dict:
+        """
+        Copy the database into dest_dir with SQLite's online backup API
+        while the app keeps running.
+
+        The main file (and the shard currently being written) is copied
+        through the writer connection `pages` pages at a time. The write
+        lock is released for `pause` seconds between batches, so the
+        writer thread keeps committing. Its writes go into the copy as
+        well, so the backup never has to restart. log_reading never
+        waits on it. Each file is written under a temporary name and
+        renamed into place when complete, so dest_dir never holds a torn
+        copy.
+
+        When partitioned, shards go to dest_dir/<name>_shards. With
+        incremental, closed shards with no inserts since the last backup (per
+        dest_dir/backup_manifest.json) are skipped; backed-up
+        shards that retention has since dropped are kept. With verify, each
+        copy must pass PRAGMA quick_check.
+        Returns dict: {'files': copied, 'skipped': unchanged shards,
+        'bytes': bytes copied, 'verified': bool or None, 'seconds': elapsed}
+        """
+        started = time.monotonic()
+        os.makedirs(dest_dir, exist_ok=True)
+        base = os.path.basename(self.db_path)
+        manifest_path = os.path.join(dest_dir, "backup_manifest.json")
+
+        manifest = {}
+        if incremental and os.path.exists(manifest_path):
+            try:
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable backup manifest: {e}")
+
+        # (schema on the writer connection or None, source path, destination path)
+        copies = [('main', self.db_path, os.path.join(dest_dir, base))]
+        skipped = 0
+        if self.partition:
+            shard_dest = os.path.join(dest_dir, os.path.splitext(base)[0] + "_shards")
+            os.makedirs(shard_dest, exist_ok=True)
+            hot = shard_key(int(time.time()), self.partition)
+            for key in self.shard_keys():
+                path = self._shard_path(key)
+                target = os.path.join(shard_dest, os.path.basename(path))
+                if key == hot:
+                    copies.append((f"shard_{key}", path, target))
+                elif (key in manifest and manifest[key] == self._shard_signature(path)
+                      and os.path.exists(target)):
+                    skipped += 1
+                else:
+                    copies.append((None, path, target))
+
+        result = {'files': 0, 'skipped': skipped, 'bytes': 0, 'verified': None}
+        for schema, path, target in copies:
+            signature = self._shard_signature(path) if schema != 'main' else None
+            if schema is None:
+                self._backup_file(path, target, pages, pause)
+            else:
+                self._backup_schema(schema, target, pages, pause)
+
+            if verify:
+                ok = self._verify_copy(target)
+                result['verified'] = ok if result['verified'] is None else result['verified'] and ok
+                if not ok:
+                    print(f"Backup of {path} failed quick_check")
+                    continue
+
+            result['files'] += 1
+            result['bytes'] += os.path.getsize(target)
+            if schema != 'main':
+                key = os.path.basename(path)[len("sensor_readings_"):-3]
+                manifest[key] = signature
+
+        with open(manifest_path + ".tmp", 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+        result['seconds'] = round(time.monotonic() - started, 2)
         return result
+
+    def _backup_schema(self, schema: str, target: str, pages: int, pause: float):
+        """Copy an attached schema of the writer connection to target."""
+        def yield_to_writer(status, remaining, total):
+            # Let queued readings commit between page batches; they are
+            # applied to the copy too because they use the same connection
+            self._write_lock.release()
+            try:
+                time.sleep(pause)
+            finally:
+                self._write_lock.acquire()
+
+        temp = target + ".tmp"
+        dest = sqlite3.connect(temp)
+        try:
+            with self._write_lock:
+                if schema != 'main':
+                    self._attach_shards(self._writer, [schema[len('shard_'):]])
+                self._writer.backup(dest, pages=pages, name=schema, progress=yield_to_writer)
+            self._finish_copy(dest)
+        finally:
+            dest.close()
+        os.replace(temp, target)
+
+    def _backup_file(self, path: str, target: str, pages: int, pause: float):
+        """Copy a database file nothing is writing to, e.g. a closed shard."""
+        temp = target + ".tmp"
+        source = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True)
+        dest = sqlite3.connect(temp)
+        try:
+            source.backup(dest, pages=pages, progress=lambda *_: time.sleep(pause))
+            self._finish_copy(dest)
+        finally:
+            dest.close()
+            source.close()
+        os.replace(temp, target)
+
+    @staticmethod
+    def _finish_copy(dest: sqlite3.Connection):
+        """Make a backup copy a single self-contained file."""
+        dest.execute("PRAGMA journal_mode=DELETE")
+
+    @staticmethod
+    def _shard_signature(path: str) -> Optional[int]:
+        """
+        Highest id ever inserted into a shard. Shards only change by
+        inserts, so an unchanged value means an unchanged shard.
+        """
+        conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True)
+        try:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'sensor_readings'").fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _verify_copy(path: str) -> bool:
+        """Whether a backup copy passes PRAGMA quick_check."""
+        conn = sqlite3.connect(f"file:{pathname2url(path)}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+        except sqlite3.Error as e:
+            print(f"Error verifying backup {path}: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def get_latest_reading(self, device: Optional[str] = None) -> Optional[Tuple]:
+        """
+        Get the most recent sensor reading of a device (default: this node).
+        This node's comes from the `recent` ring buffer, else the newest
+        queued reading, else the database.
+        """
+        device = device or self.device_id
+        if device == self.device_id:
+            latest = self.recent.latest()
+            if latest is not None:
+                return latest
+
+            with self._queue_cond:
+                if self._latest is not None:
+                    return self._latest
+
+        conn = self._reader()
+        schemas = ['main']
+        if self.partition:
+            # Newest shard first; main only holds pre-partition history
+            schemas = [f"shard_{key}" for key in reversed(self.shard_keys())] + schemas
+
+        for schema in schemas:
+            if schema != 'main' and not self._attach_shards(conn, [schema[len('shard_'):]]):
+                continue
+            row = conn.execute(f'''
+                SELECT ts, {', '.join(self.metrics)}
+                FROM {schema}.sensor_readings
+                WHERE device_id = ? AND ts = (
+                    SELECT MAX(ts) FROM {schema}.sensor_readings WHERE device_id = ?
+                )
+                ORDER BY id DESC
+                LIMIT 1
+            ''', (device, device)).fetchone()
+            if row:
+                return row
+        return None
+
+    def get_fleet_latest(self, devices: Optional[Sequence[str]] = None) -> Dict[str, Optional[Tuple]]:
+        """Latest reading of each device (default: all), keyed by device_id."""
+        devices = list(devices) if devices is not None else self.device_ids()
+        return {device: self.get_latest_reading(device) for device in devices}
+
+    def log_river_readings(self, rows: Iterable[Tuple]) -> int:
+        """
+        Upsert (site_id, parameter, ts, value) gauge readings, e.g. every
+        value of a USGS fetch. ts may be epoch seconds or a datetime.
+        Returns the number of rows written.
+        """
+        rows = [(site_id, parameter, to_epoch(ts), value)
+                for site_id, parameter, ts, value in rows]
+        if not rows:
+            return 0
+
+        with self._write_lock:
+            with self._writer:
+                self._writer.executemany('''
+                    INSERT INTO river_readings (site_id, parameter, ts, value)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (site_id, parameter, ts) DO UPDATE SET
+                        value = excluded.value
+                ''', rows)
+        return len(rows)
+
+    def get_river_readings(self, site_id: str, parameter: str,
+                           start: Union[datetime, int, float],
+                           end: Union[datetime, int, float]) -> List[Tuple]:
+        """
+        Gauge readings for one site and USGS parameter code with
+        start <= ts <= end. Returns list of tuples (ts, value), oldest first.
+        """
+        cursor = self._reader().execute('''
+            SELECT ts, value FROM river_readings
+            WHERE site_id = ? AND parameter = ? AND ts BETWEEN ? AND ?
+            ORDER BY ts ASC
+        ''', (site_id, parameter, to_epoch(start), to_epoch(end)))
+        return cursor.fetchall()
+
+    def log_forecast(self, location: str, issued: Union[datetime, int, float],
+                     periods: Iterable[Dict]) -> int:
+        """
+        Upsert the periods of one forecast issued at `issued`. Each period is
+        a dict with start_ts and end_ts (epoch seconds or datetimes) and
+        optionally name, temperature, precipitation_chance, wind_speed,
+        wind_direction and conditions. Returns the number of rows written.
+        """
+        issued_ts = to_epoch(issued)
+        rows = [(location, issued_ts, to_epoch(period['start_ts']), to_epoch(period['end_ts']),
+                 period.get('name'), period.get('temperature'),
+                 period.get('precipitation_chance'), period.get('wind_speed'),
+                 period.get('wind_direction'), period.get('conditions'))
+                for period in periods]
+        if not rows:
+            return 0
+
+        with self._write_lock:
+            with self._writer:
+                self._writer.executemany('''
+                    INSERT INTO forecast_snapshots
+                    (location, issued_ts, start_ts, end_ts, name, temperature,
+                     precipitation_chance, wind_speed, wind_direction, conditions)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (location, issued_ts, start_ts) DO UPDATE SET
+                        end_ts = excluded.end_ts,
+                        name = excluded.name,
+                        temperature = excluded.temperature,
+                        precipitation_chance = excluded.precipitation_chance,
+                        wind_speed = excluded.wind_speed,
+                        wind_direction = excluded.wind_direction,
+                        conditions = excluded.conditions
+                ''', rows)
+        return len(rows)
+
+    def get_forecast_history(self, location: str, start: Union[datetime, int, float],
+                             end: Union[datetime, int, float]) -> List[Tuple]:
+        """
+        Every stored forecast for periods starting within [start, end], so
+        successive forecasts for the same period can be compared.
+        Returns list of tuples (start_ts, end_ts, issued_ts, name, temperature,
+        precipitation_chance, conditions), by period then issue time.
+        """
+        cursor = self._reader().execute('''
+            SELECT start_ts, end_ts, issued_ts, name, temperature,
+                   precipitation_chance, conditions
+            FROM forecast_snapshots
+            WHERE location = ? AND start_ts BETWEEN ? AND ?
+            ORDER BY start_ts ASC, issued_ts ASC
+        ''', (location, to_epoch(start), to_epoch(end)))
+        return cursor.fetchall()
+
+    def close(self):
+        """Write queued readings, stop the writer thread and close connections."""
+        if self._closed:
+            return
+
+        with self._queue_cond:
+            self._stopping = True
+            self._queue_cond.notify_all()
+        self._writer_thread.join()
+        self._closed = True
+
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"Error closing reader connection: {e}")
+
+        with self._write_lock:
+            try:
+                # Fold the WAL back into the main file so it can be copied alone
+                self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            except sqlite3.Error as e:
+                print(f"Error checkpointing database: {e}")
+            self._writer.close()
@@ -0,0 +1,220 @@
+"""
+Sensor driver registry.
+
+Each driver declares the metrics it produces (with display label, unit,
+precision and typical value), its preferred sample interval and how to
+create and read the device. SensorReader polls every enabled driver in its own worker thread,
+and storage and the UI take their metric set from here. Smoothing, display
+deadbands and mock data default to values derived from each Metric, so
+supporting a new sensor means adding one registered class; the
+SENSOR_FILTERS and SENSOR_DEADBANDS entries in config/constants.py only
+override those defaults.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+
+class Metric(NamedTuple):
+    """One value produced by a driver."""
+    name: str           # Key in readings and column in sensor_readings
+    label: str          # Display name
+    unit: str           # Display unit ('' for none)
+    decimals: int = 1   # Display precision, also of filtered and mock values
+    graph: bool = True  # Offered in the Indoor tab's graph sidebar
+    typical: Optional[float] = None   # Typical indoor value, for mock data
+    deadband: Optional[float] = None  # Change worth a redraw (default: one display step)
+
+
+# Smoothing for metrics without a SENSOR_FILTERS entry (see data/filters.py)
+DEFAULT_FILTER = {'window': 5, 'ema_alpha': 0.3}
+
+
+def default_filter(metric: Metric) -> Dict:
+    """MetricFilter options for a metric without a SENSOR_FILTERS entry."""
+    return dict(DEFAULT_FILTER, decimals=metric.decimals)
+
+
+def default_deadband(metric: Metric) -> float:
+    """Display deadband for a metric without a SENSOR_DEADBANDS entry."""
+    if metric.deadband is not None:
+        return metric.deadband
+    return 10 ** -metric.decimals
+
+
+class SensorDriver:
+    """
+    Base class for a sensor driver.
+
+    Subclasses set `name`, `metrics`, `sample_interval`, and the `packages`
+    and `wiring` hints shown when the device can't be set up, and implement
+    init() and read(). read() runs on the device's worker thread and should
+    raise on I/O errors; the worker times it out, counts failures and calls
+    init() again to recover.
+    """
+
+    name = ''
+    metrics: Tuple[Metric, ...] = ()
+    sample_interval = 1.0
+    packages: Tuple[str, ...] = ()
+    wiring = ''
+
+    def __init__(self):
+        self.device = None
+
+    @classmethod
+    def metric_names(cls) -> Tuple[str, ...]:
+        """Names of the metrics this driver produces, in declaration order."""
+        return tuple(metric.name for metric in cls.metrics)
+
+    def init(self, i2c):
+        """Create (or re-create) the device on the I2C bus."""
+        raise NotImplementedError
+
+    def read(self) -> Dict[str, float]:
+        """Read every metric from the device."""
+        raise NotImplementedError
+
+
+# Registered driver classes by name
+DRIVERS: Dict[str, Type[SensorDriver]] = {}
+
+
+def register_driver(cls: Type[SensorDriver]) -> Type[SensorDriver]:
+    """Class decorator adding a driver to DRIVERS."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} needs a name")
+    DRIVERS[cls.name] = cls
+    return cls
+
+
+def get_drivers(names: Sequence[str]) -> List[Type[SensorDriver]]:
+    """Driver classes for `names`, in order. Raises ValueError for unknown names."""
+    unknown = [name for name in names if name not in DRIVERS]
+    if unknown:
+        raise ValueError(f"Unknown sensor drivers: {', '.join(unknown)} "
+                         f"(registered: {', '.join(DRIVERS)})")
+    return [DRIVERS[name] for name in names]
+
+
+def device_metrics(names: Sequence[str]) -> Dict[str, Tuple[str, ...]]:
+    """Metric names produced by each of the named drivers."""
+    return {cls.name: cls.metric_names() for cls in get_drivers(names)}
+
+
+def driver_metrics(names: Sequence[str]) -> List[Metric]:
+    """Every metric of the named drivers, in driver then declaration order."""
+    metrics = []
+    seen = set()
+    for cls in get_drivers(names):
+        for metric in cls.metrics:
+            if metric.name not in seen:
+                seen.add(metric.name)
+                metrics.append(metric)
+    return metrics
+
+
+def metric_info(name: str) -> Optional[Metric]:
+    """Declaration of a metric by any registered driver, or None."""
+    for cls in DRIVERS.values():
+        for metric in cls.metrics:
+            if metric.name == name:
+                return metric
+    return None
+
+
+@register_driver
+class BME680Driver(SensorDriver):
+    """Bosch BME680 temperature, humidity, pressure and gas sensor."""
+
+    name = 'bme680'
+    metrics = (
+        Metric('temperature', 'Temperature', '°F', 1),
+        Metric('humidity', 'Humidity', '%', 1),
+        Metric('pressure', 'Pressure', 'inHg', 2),
+        Metric('gas_resistance', 'Air Quality', 'Ohms', 0),
+    )
+    # The gas heater needs time between readings
+    sample_interval = 3.0
+    packages = ('adafruit-circuitpython-bme680',)
+    wiring = 'SDA→GPIO2, SCL→GPIO3, VCC→3.3V, GND→GND'
+
+    def init(self, i2c):
+        import adafruit_bme680
+
+        self.device = adafruit_bme680.Adafruit_BME680_I2C(i2c)
+        # Sea level pressure for altitude compensation
+        self.device.sea_level_pressure = 1013.25
+
+    def read(self) -> Dict[str, float]:
+        temp_c = self.device.temperature
+        temp_f = (temp_c * 9/5) + 32
+        humidity = self.device.humidity
+        pressure_hpa = self.device.pressure
+        pressure_inhg = pressure_hpa * 0.02953
+        gas_resistance = self.device.gas
+
+        return {
+            'temperature': round(temp_f, 1),
+            'humidity': round(humidity, 1),
+            'pressure': round(pressure_inhg, 2),
+            'gas_resistance': round(gas_resistance, 0)
+        }
+
+
+@register_driver
+class PMSA003IDriver(SensorDriver):
+    """Plantower PMSA003I particulate matter sensor."""
+
+    name = 'pmsa003i'
+    metrics = (
+        Metric('pm1', 'PM1.0', 'µg/m³', 1, graph=False),
+        Metric('pm25', 'PM2.5', 'µg/m³', 1),
+        Metric('pm10', 'PM10', 'µg/m³', 1, graph=False),
+    )
+    # Produces a new reading every second
+    sample_interval = 1.0
+    packages = ('adafruit-circuitpython-pm25',)
+    wiring = 'SDA→GPIO2, SCL→GPIO3, VCC→5V, GND→GND'
+
+    def init(self, i2c):
+        from adafruit_pm25.i2c import PM25_I2C
+
+        reset_pin = None  # Using default I2C address
+        self.device = PM25_I2C(i2c, reset_pin)
+
+    def read(self) -> Dict[str, float]:
+        pm_data = self.device.read()
+        return {
+            'pm1': pm_data["pm10 standard"],
+            'pm25': pm_data["pm25 standard"],
+            'pm10': pm_data["pm100 standard"]
+        }
+
+
+@register_driver
+class SCD4xDriver(SensorDriver):
+    """Sensirion SCD40/SCD41 NDIR CO2 sensor."""
+
+    name = 'scd4x'
+    metrics = (
+        Metric('co2', 'CO2', 'ppm', 0, typical=650, deadband=10),
+    )
+    # Periodic measurement mode produces a reading every 5 seconds
+    sample_interval = 5.0
+    packages = ('adafruit-circuitpython-scd4x',)
+    wiring = 'SDA→GPIO2, SCL→GPIO3, VCC→3.3V, GND→GND'
+
+    def __init__(self):
+        super().__init__()
+        self._last = None
+
+    def init(self, i2c):
+        import adafruit_scd4x
+
+        self.device = adafruit_scd4x.SCD4X(i2c)
+        self.device.start_periodic_measurement()
+
+    def read(self) -> Dict[str, float]:
+        # Between measurements the sensor has nothing new; repeat the last one
+        if self.device.data_ready or self._last is None:
+            self._last = {'co2': float(self.device.CO2)}
+        return dict(self._last)
@@ -0,0 +1,218 @@
+"""Smoothing filters applied to sensor samples before display and logging,
+and the deadband that decides when the display needs redrawing."""
+from typing import Callable, Dict, Hashable, Optional
+
+
+class MetricFilter:
+    """
+    Filters one metric over a fixed-size ring buffer of recent samples.
+
+    Each sample passes three optional stages:
+      1. Outlier rejection: a sample further than `outlier_mads` scaled
+         median absolute deviations (and at least `min_deviation`) from the
+         window median is held back. A run of such samples longer than half
+         the window is a real step change, and the whole run is accepted.
+      2. Median of the last `window` accepted samples.
+      3. Exponential moving average of that median with weight `ema_alpha`.
+
+    Windows are a handful of samples, so plain Python beats NumPy here.
+    """
+
+    def __init__(self, window: int = 5, ema_alpha: Optional[float] = None,
+                 outlier_mads: Optional[float] = None, min_deviation: float = 0.0,
+                 decimals: Optional[int] = None):
+        """
+        window:        Samples in the median (1 disables the median).
+        ema_alpha:     EMA weight of the newest median, 0-1 (None disables).
+        outlier_mads:  Rejection threshold in scaled MADs (None disables).
+        min_deviation: Smallest absolute deviation ever rejected, so flat
+                       signals with a MAD of zero don't reject every change.
+        decimals:      Rounding applied to the output.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        if ema_alpha is not None and not 0 < ema_alpha <= 1:
+            raise ValueError("ema_alpha must be in (0, 1]")
+
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self.outlier_mads = outlier_mads
+        self.min_deviation = min_deviation
+        self.decimals = decimals
+
+        self._buffer = [0.0] * window
+        self._next = 0
+        self._size = 0
+        self._ema = None
+        self._pending = []
+        self.rejected = 0
+
+    def update(self, value) -> Optional[float]:
+        """Feed one sample and return the filtered value (None until the first sample)."""
+        if not isinstance(value, (int, float)):
+            return self.value()
+
+        if not self._is_outlier(value):
+            # The held-back run was a spike after all
+            self.rejected += len(self._pending)
+            self._pending = []
+            self._push(float(value))
+        else:
+            self._pending.append(float(value))
+            if len(self._pending) > self.window // 2:
+                for sample in self._pending:
+                    self._push(sample)
+                self._pending = []
+
+        return self.value()
+
+    def _push(self, value: float):
+        """Add an accepted sample and advance the median and EMA."""
+        self._buffer[self._next] = value
+        self._next = (self._next + 1) % self.window
+        self._size = min(self._size + 1, self.window)
+
+        median = self._median()
+        if self.ema_alpha is None or self._ema is None:
+            self._ema = median
+        else:
+            self._ema += self.ema_alpha * (median - self._ema)
+
+    def value(self) -> Optional[float]:
+        """Current filtered value without feeding a sample."""
+        if self._ema is None or self.decimals is None:
+            return self._ema
+        return round(self._ema, self.decimals)
+
+    def reset(self):
+        """Forget all samples, e.g. after the sensor is re-initialized."""
+        self._next = 0
+        self._size = 0
+        self._ema = None
+        self._pending = []
+
+    def _median(self) -> float:
+        """Median of the buffered samples."""
+        ordered = sorted(self._buffer[:self._size])
+        mid = self._size // 2
+        if self._size % 2:
+            return ordered[mid]
+        return (ordered[mid - 1] + ordered[mid]) / 2
+
+    def _is_outlier(self, value: float) -> bool:
+        """Whether value is too far from the window median."""
+        # Need a few samples before the spread means anything
+        if self.outlier_mads is None or self._size < 3:
+            return False
+
+        median = self._median()
+        deviations = sorted(abs(sample - median) for sample in self._buffer[:self._size])
+        # 1.4826 scales the MAD to a standard deviation for normal noise
+        mad = 1.4826 * deviations[len(deviations) // 2]
+        limit = max(self.outlier_mads * mad, self.min_deviation)
+        return abs(value - median) > limit
+
+
+class SensorFilter:
+    """Applies a MetricFilter per metric to whole sensor readings."""
+
+    def __init__(self, config: Dict[str, Optional[Dict]]):
+        """
+        config maps metric name to MetricFilter keyword arguments, or to
+        None to pass that metric through unfiltered.
+        """
+        self.filters = {metric: MetricFilter(**options)
+                        for metric, options in config.items() if options is not None}
+
+    def update(self, values: Dict[str, float]) -> Dict[str, float]:
+        """Feed one reading and return the filtered reading."""
+        filtered = dict(values)
+        for metric, value in values.items():
+            metric_filter = self.filters.get(metric)
+            if metric_filter is not None:
+                result = metric_filter.update(value)
+                filtered[metric] = value if result is None else result
+        return filtered
+
+    def reset(self):
+        """Reset every metric's filter."""
+        for metric_filter in self.filters.values():
+            metric_filter.reset()
+
+    def rejected(self) -> Dict[str, int]:
+        """Outlier samples rejected so far, per metric."""
+        return {metric: f.rejected for metric, f in self.filters.items()}
+
+
+class Deadband:
+    """
+    Decides when a reading has changed enough to be worth redrawing.
+
+    Each metric has a deadband: a new reading counts as a change once any
+    value differs from the last published one by at least its band, a
+    metric appears or disappears, or a classifier (e.g. the air quality
+    status of PM2.5) puts a value in a different class. Small wobbles
+    inside the band leave the published reading, and the screen, alone.
+    """
+
+    def __init__(self, bands: Dict[str, Optional[float]],
+                 classifiers: Optional[Dict[str, Callable[[float], Hashable]]] = None,
+                 max_age: Optional[float] = None):
+        """
+        bands:       Metric name to smallest change worth publishing; None
+                     ignores the metric. Metrics not listed publish on any change.
+        classifiers: Metric name to a function mapping a value to a status
+                     class; a class change publishes regardless of the band.
+        max_age:     Seconds after which the reading is republished anyway
+                     (None for never).
+        """
+        self.bands = bands
+        self.classifiers = classifiers or {}
+        self.max_age = max_age
+        self.published: Optional[Dict[str, float]] = None
+        self.published_at: Optional[float] = None
+        self.checked = 0
+        self.changes = 0
+
+    def update(self, values: Dict[str, float], now: float) -> Optional[Dict[str, float]]:
+        """
+        Feed one reading taken at `now` (epoch seconds). Returns it, and
+        makes it the published reading, if it changed enough; else None.
+        """
+        self.checked += 1
+        if not self._changed(values, now):
+            return None
+
+        self.published = dict(values)
+        self.published_at = now
+        self.changes += 1
+        return self.published
+
+    def _changed(self, values: Dict[str, float], now: float) -> bool:
+        """Whether values differ from the published reading beyond the bands."""
+        if self.published is None:
+            return True
+        if self.max_age is not None and now - self.published_at >= self.max_age:
+            return True
+
+        for metric in values.keys() | self.published.keys():
+            band = self.bands.get(metric, 0.0)
+            if band is None:
+                continue
+            value = values.get(metric)
+            last = self.published.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(last, (int, float)):
+                if value != last:
+                    return True
+                continue
+            if abs(value - last) >= band and value != last:
+                return True
+            classify = self.classifiers.get(metric)
+            if classify is not None and classify(value) != classify(last):
+                return True
+        return False
+
+    def reset(self):
+        """Forget the published reading so the next one is always a change."""
+        self.published = None
+        self.published_at = None
@@ -0,0 +1,351 @@
+"""
+Mock sensor backends for running the dashboard without I2C hardware.
+
+SyntheticSensors produces seeded, repeatable time series with daily cycles,
+slow drift, pollution events and sensor dropouts. ReplaySensors plays back a
+recorded CSV or sensor database, optionally many times faster than real
+time, for load-testing the dashboard against months of data.
+"""
+import glob
+import heapq
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+from urllib.request import pathname2url
+
+from data.csv_readings import read_csv_rows
+from data.database import READING_COLUMNS
+from data.drivers import metric_info
+
+# Shape of each synthetic metric:
+#   base:      mean level
+#   daily:     amplitude of the 24 h cycle, peaking at peak_hour (UTC)
+#   drift:     amplitude of the slow multi-day wander
+#   noise:     standard deviation of per-sample noise
+#   event:     change at the peak of a pollution event (cooking, smoke)
+#   decimals:  rounding, matching the real sensors
+# Optional: other driver metrics get a model derived from Metric.typical.
+METRIC_MODELS = {
+    'temperature': {'base': 70.5, 'daily': 2.5, 'peak_hour': 22, 'drift': 1.5,
+                    'noise': 0.1, 'event': 1.0, 'decimals': 1},
+    'humidity': {'base': 40.0, 'daily': -4.0, 'peak_hour': 22, 'drift': 6.0,
+                 'noise': 0.4, 'event': 3.0, 'decimals': 1},
+    'pressure': {'base': 29.92, 'daily': 0.02, 'peak_hour': 16, 'drift': 0.25,
+                 'noise': 0.004, 'event': 0.0, 'decimals': 2},
+    'gas_resistance': {'base': 120000, 'daily': 15000, 'peak_hour': 10, 'drift': 25000,
+                       'noise': 1500, 'event': -60000, 'decimals': 0},
+    'pm1': {'base': 3.0, 'daily': 1.0, 'peak_hour': 1, 'drift': 1.5,
+            'noise': 0.4, 'event': 30.0, 'decimals': 1},
+    'pm25': {'base': 6.0, 'daily': 2.0, 'peak_hour': 1, 'drift': 3.0,
+             'noise': 0.8, 'event': 55.0, 'decimals': 1},
+    'pm10': {'base': 9.0, 'daily': 3.0, 'peak_hour': 1, 'drift': 4.0,
+             'noise': 1.2, 'event': 70.0, 'decimals': 1},
+    'co2': {'base': 650, 'daily': 150, 'peak_hour': 21, 'drift': 80,
+            'noise': 8, 'event': 250, 'decimals': 0},
+}
+
+# Models derived for driver metrics without a METRIC_MODELS entry
+_derived_models: Dict[str, Optional[Dict]] = {}
+
+
+def metric_model(metric: str) -> Optional[Dict]:
+    """
+    METRIC_MODELS entry for a metric, or one derived from its driver
+    declaration: a gentle daily cycle and drift around Metric.typical, with
+    no response to events. None without either.
+    """
+    model = METRIC_MODELS.get(metric)
+    if model is None:
+        if metric not in _derived_models:
+            info = metric_info(metric)
+            if info is None or info.typical is None:
+                _derived_models[metric] = None
+            else:
+                scale = abs(info.typical)
+                _derived_models[metric] = {
+                    'base': info.typical, 'daily': 0.05 * scale, 'peak_hour': 12,
+                    'drift': 0.1 * scale, 'noise': 0.01 * scale, 'event': 0.0,
+                    'decimals': info.decimals
+                }
+        model = _derived_models[metric]
+    return model
+
+
+# Pollution events decay with this time constant (seconds)
+EVENT_DECAY = 900
+
+# Wander periods of the drift term (seconds); incommensurate so it never repeats
+DRIFT_PERIODS = (3.7 * 86400, 11.3 * 86400)
+
+_MASK = (1 << 64) - 1
+
+
+class SensorDropout(OSError):
+    """A simulated failed read, as a loose I2C connection would produce."""
+
+
+def _key(part) -> int:
+    """Integer form of a hash key part."""
+    if isinstance(part, str):
+        return int.from_bytes(part.encode(), 'little') & _MASK
+    return part & _MASK
+
+
+def _hash(*parts) -> int:
+    """Stable 64-bit hash of ints and strings (splitmix64 chain)."""
+    state = 0x9E3779B97F4A7C15
+    for part in parts:
+        state = (state ^ _key(part)) * 0xBF58476D1CE4E5B9 & _MASK
+        state = (state ^ (state >> 30)) * 0x94D049BB133111EB & _MASK
+        state ^= state >> 31
+    return state
+
+
+def _uniform(*parts) -> float:
+    """Deterministic uniform value in [0, 1) for the given key."""
+    return _hash(*parts) / 2 ** 64
+
+
+def _gauss(*parts) -> float:
+    """Deterministic standard-normal value for the given key (Box-Muller)."""
+    bits = _hash(*parts)
+    u1 = ((bits >> 32) + 1) / 2 ** 32
+    u2 = (bits & 0xFFFFFFFF) / 2 ** 32
+    return math.sqrt(-2.0 * math.log(u1)) * math.cos(2 * math.pi * u2)
+
+
+class SyntheticSensors:
+    """
+    Seeded synthetic sensor data as a pure function of (seed, time).
+
+    Values don't depend on how often or in what order devices are read, so
+    two runs with the same seed graph identically and worker threads can
+    sample concurrently. With speed > 1 the simulated clock runs that many
+    times faster than the wall clock.
+    """
+
+    def __init__(self, seed: int = 0, speed: float = 1.0, start: Optional[float] = None,
+                 event_rate: float = 0.08, dropout_rate: float = 0.005):
+        """
+        seed:         Selects the series; same seed, same data.
+        speed:        Simulated seconds per wall-clock second.
+        start:        Simulated epoch time at creation (default: now).
+        event_rate:   Chance of a pollution event starting in any hour.
+        dropout_rate: Chance that a device read fails in any minute.
+        """
+        self.seed = seed
+        self.speed = speed
+        self.event_rate = event_rate
+        self.dropout_rate = dropout_rate
+        self._wall_start = time.time()
+        self._sim_start = self._wall_start if start is None else start
+
+    def now(self) -> float:
+        """Current simulated epoch time."""
+        return self._sim_start + (time.time() - self._wall_start) * self.speed
+
+    def read(self, metrics: Sequence[str]) -> Dict[str, float]:
+        """
+        Values of one device's metrics at the simulated time.
+        Raises SensorDropout while the device is in a dropout.
+        """
+        t = self.now()
+        if self.dropped_out(metrics, t):
+            raise SensorDropout("simulated read failure")
+        event = self.event_level(t)
+        return {metric: self.value(metric, t, event) for metric in metrics}
+
+    def dropped_out(self, metrics: Sequence[str], t: float) -> bool:
+        """Whether the device reading `metrics` is failing at time t."""
+        return _uniform(self.seed, 'dropout', metrics[0], int(t // 60)) < self.dropout_rate
+
+    def value(self, metric: str, t: float, event: Optional[float] = None) -> Optional[float]:
+        """
+        Value of one metric at epoch time t (None for metrics without a
+        METRIC_MODELS entry). event is event_level(t), passed in when
+        several metrics are computed for the same instant.
+        """
+        model = metric_model(metric)
+        if model is None:
+            return None
+        if event is None:
+            event = self.event_level(t)
+        day_phase = 2 * math.pi * ((t - model['peak_hour'] * 3600) % 86400) / 86400
+        offset = _uniform(self.seed, 'drift', metric) * 2 * math.pi
+
+        value = (model['base']
+                 + model['daily'] * math.cos(day_phase)
+                 + model['drift'] * (0.6 * math.sin(2 * math.pi * t / DRIFT_PERIODS[0] + offset)
+                                     + 0.4 * math.sin(2 * math.pi * t / DRIFT_PERIODS[1]
+                                                      + 2 * offset))
+                 + model['event'] * event
+                 + model['noise'] * _gauss(self.seed, metric, int(t)))
+        # Every metric is a physical quantity that can't go negative
+        return round(max(value, 0.0), model['decimals'])
+
+    def event_level(self, t: float) -> float:
+        """
+        Strength (0-1) of pollution events at time t. Events are shared by
+        every metric, so PM rises while gas resistance drops.
+        """
+        hour = int(t // 3600)
+        level = 0.0
+        # Events decay within a few hours, so only recent hours matter
+        for slot in range(hour - 3, hour + 1):
+            if _uniform(self.seed, 'event', slot) >= self.event_rate:
+                continue
+            onset = slot * 3600 + _uniform(self.seed, 'onset', slot) * 3600
+            if t >= onset:
+                size = 0.3 + 0.7 * _uniform(self.seed, 'size', slot)
+                level += size * math.exp(-(t - onset) / EVENT_DECAY)
+        return min(level, 1.0)
+
+    def generate(self, start: int, end: int, interval: int = 60,
+                 metrics_by_device: Optional[Dict[str, Sequence[str]]] = None,
+                 columns: Sequence[str] = READING_COLUMNS) -> Iterator[Tuple]:
+        """
+        Yield (ts, <columns...>) rows from start to end, one every
+        `interval` seconds, for backfilling a database. Metrics of a device
+        in a dropout are None. metrics_by_device groups metrics that fail
+        together (default: all columns as one device).
+        """
+        groups = list((metrics_by_device or {'all': columns}).values())
+        # Align to the interval so regenerating a window hits the same timestamps
+        first = -(-int(start) // interval) * interval
+        for ts in range(first, int(end), interval):
+            event = self.event_level(ts)
+            values = {}
+            for metrics in groups:
+                dropped = self.dropped_out(metrics, ts)
+                for metric in metrics:
+                    values[metric] = None if dropped else self.value(metric, ts, event)
+            yield (ts, *(values.get(metric) for metric in columns))
+
+
+class ReplaySensors:
+    """
+    Plays back recorded readings against a clock running `speed` times
+    faster than real time. Each read returns the newest recorded reading at
+    or before the replay clock; at the end of the recording it starts over
+    (loop=True) or keeps returning the last reading.
+    """
+
+    def __init__(self, path: str, speed: float = 60.0, loop: bool = True,
+                 device: Optional[str] = None):
+        """
+        path:   CSV (see db_tool.py import) or sensor database file; a
+                partitioned database's shard directory is included.
+        speed:  Recorded seconds replayed per wall-clock second.
+        loop:   Restart from the beginning after the last reading.
+        device: Only replay this device_id's readings (default: all).
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No recording at {path}")
+        self.path = path
+        self.speed = speed
+        self.loop = loop
+        self.device = device
+
+        self._lock = threading.Lock()
+        self._restart()
+        if self._next is None:
+            raise ValueError(f"{path} contains no readings")
+
+    def _restart(self):
+        """Rewind to the first recorded reading and re-anchor the clock."""
+        self._rows = self._open()
+        self._current = {}
+        self._next = next(self._rows, None)
+        self._wall_start = time.time()
+        self._first_ts = self._next[0] if self._next else 0
+
+    def now(self) -> float:
+        """Current position of the replay clock in recorded epoch time."""
+        return self._first_ts + (time.time() - self._wall_start) * self.speed
+
+    def read(self, metrics: Sequence[str]) -> Dict[str, float]:
+        """Recorded values of `metrics` at the replay clock (None if never recorded)."""
+        with self._lock:
+            self._advance()
+            return {metric: self._current.get(metric) for metric in metrics}
+
+    def _advance(self):
+        """Consume every recorded reading up to the replay clock."""
+        t = self.now()
+        while self._next is not None and self._next[0] <= t:
+            ts, values = self._next
+            # A gap in one metric keeps showing its last recorded value
+            self._current.update({metric: value for metric, value in values.items()
+                                  if value is not None})
+            self._next = next(self._rows, None)
+
+        if self._next is None and self.loop:
+            self._restart()
+
+    def _open(self) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """(ts, values) pairs from the recording, oldest first."""
+        if self.path.lower().endswith('.csv'):
+            return self._csv_rows()
+        return self._database_rows()
+
+    def _csv_rows(self) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """Readings from a CSV file, which must already be in time order."""
+        for row in read_csv_rows(self.path, metrics=None):
+            device = row.pop('device_id')
+            if self.device and device not in (None, self.device):
+                continue
+            yield row.pop('ts'), row
+
+    def _database_rows(self) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """Readings from a database file and its shards, merged in time order."""
+        files = [self.path]
+        shard_dir = os.path.splitext(self.path)[0] + "_shards"
+        files += sorted(glob.glob(os.path.join(shard_dir, "sensor_readings_*.db")))
+
+        streams = [self._file_rows(file) for file in files]
+        yield from heapq.merge(*streams, key=lambda row: row[0])
+
+    def _file_rows(self, path: str,
+                   batch_size: int = 1000) -> Iterator[Tuple[int, Dict[str, float]]]:
+        """(ts, values) pairs of every metric column in one file, read-only, oldest first."""
+        conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+        try:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(sensor_readings)")]
+            if 'ts' not in columns:
+                return
+            metrics = [column for column in columns if column not in ('id', 'device_id', 'ts')]
+
+            where, params = '', ()
+            if self.device and 'device_id' in columns:
+                where, params = 'WHERE device_id = ?', (self.device,)
+            cursor = conn.execute(f'''
+                SELECT ts, {', '.join(metrics)}
+                FROM sensor_readings {where}
+                ORDER BY ts ASC
+            ''', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for ts, *values in rows:
+                    yield ts, dict(zip(metrics, values))
+        finally:
+            conn.close()
+
+
+def create_mock_backend(config: Dict):
+    """
+    Build the mock backend described by a SENSOR_MOCK-style dict:
+    {'mode': 'synthetic', 'seed': 1, 'speed': 1.0} or
+    {'mode': 'replay', 'path': 'readings.csv', 'speed': 60.0, 'loop': True}.
+    """
+    options = dict(config)
+    mode = options.pop('mode', 'synthetic')
+    if mode == 'synthetic':
+        return SyntheticSensors(**options)
+    if mode == 'replay':
+        return ReplaySensors(**options)
+    raise ValueError(f"Unknown mock sensor mode: {mode}")
@@ -1,5 +1,6 @@
 """National Weather Service API client for weather forecasts."""
 import requests
+from datetime import datetime, timedelta
 from typing import Dict, Optional, List
 import json
 import os
@@ -10,9 +11,14 @@ class NWSClient:
 
     BASE_URL = "https://api.weather.gov"
 
-    def __init__(self, cache_dir: str = "cache"):
-        """Initialize NWS client with caching."""
+    def __init__(self, cache_dir: str = "cache", database=None):
+        """
+        Initialize NWS client with caching.
+        database: optional SensorDatabase that every fetched forecast is
+        appended to (forecast_snapshots), for forecast-accuracy comparisons.
+        """
         self.cache_dir = cache_dir
+        self.database = database
         os.makedirs(cache_dir, exist_ok=True)
 
         # User agent required by NWS API
@@ -53,6 +59,7 @@ class NWSClient:
             # Cache the result
             if result:
                 self._cache_forecast(location_name, result)
+                self._store_history(location_name, forecast_data)
 
             return result
 
@@ -160,6 +167,47 @@ class NWSClient:
         except Exception as e:
             print(f"Error caching forecast for {location_name}: {e}")
 
+    def _store_history(self, location_name: str, forecast_data: dict):
+        """Append every period of a forecast to the history database."""
+        if self.database is None:
+            return
+
+        try:
+            properties = forecast_data['properties']
+            issued = properties.get('updateTime') or properties['generatedAt']
+
+            periods = []
+            for period in properties['periods']:
+                periods.append({
+                    'start_ts': self._parse_time(period['startTime']),
+                    'end_ts': self._parse_time(period['endTime']),
+                    'name': period['name'],
+                    'temperature': period['temperature'],
+                    'precipitation_chance': period.get('probabilityOfPrecipitation', {}).get('value'),
+                    'wind_speed': period.get('windSpeed'),
+                    'wind_direction': period.get('windDirection'),
+                    'conditions': period['shortForecast']
+                })
+
+            self.database.log_forecast(location_name, self._parse_time(issued), periods)
+        except Exception as e:
+            print(f"Error storing forecast history for {location_name}: {e}")
+
+    def _parse_time(self, value: str) -> datetime:
+        """Parse an NWS ISO 8601 timestamp."""
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+    def get_history(self, location_name: str, hours: int = 48) -> List[tuple]:
+        """
+        Every stored forecast for periods starting in the last N hours, as
+        (start_ts, end_ts, issued_ts, name, temperature, precipitation_chance,
+        conditions) tuples, by period then issue time.
+        """
+        if self.database is None:
+            return []
+        end = datetime.now()
+        return self.database.get_forecast_history(location_name, end - timedelta(hours=hours), end)
+
     def _load_cached_forecast(self, location_name: str) -> Optional[Dict]:
         """Load forecast data from cache file."""
         cache_file = os.path.join(self.cache_dir, f"nws_{location_name.replace(' ', '_')}.json")
@@ -0,0 +1,109 @@
+"""Fixed-size, NumPy-backed ring buffer of recent sensor readings."""
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class ReadingRingBuffer:
+    """
+    Holds the last `capacity` readings in preallocated arrays.
+
+    The sensor thread appends every reading it takes; the UI reads the latest
+    value or a recent window without touching SQLite. Appends overwrite the
+    oldest slot, so memory use never grows.
+    """
+
+    def __init__(self, metrics: Sequence[str], capacity: int):
+        """Preallocate storage for `capacity` readings of `metrics`."""
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self._index = {metric: i for i, metric in enumerate(self.metrics)}
+
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, len(self.metrics)), np.nan)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ts: float, values: Dict[str, float]):
+        """Store one reading; missing or non-numeric values become NaN."""
+        row = [value if isinstance(value, (int, float)) else np.nan
+               for value in (values.get(metric) for metric in self.metrics)]
+
+        with self._lock:
+            self._ts[self._next] = int(ts)
+            self._values[self._next] = row
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def oldest_ts(self) -> Optional[int]:
+        """Timestamp of the oldest buffered reading, or None if empty."""
+        with self._lock:
+            if not self._size:
+                return None
+            return int(self._ts[(self._next - self._size) % self.capacity])
+
+    def covers(self, start: int) -> bool:
+        """Whether every reading since `start` is still in the buffer."""
+        oldest = self.oldest_ts()
+        return oldest is not None and oldest <= start
+
+    def latest(self) -> Optional[Tuple]:
+        """Newest reading as (ts, <metrics...>) with None for missing values."""
+        with self._lock:
+            if not self._size:
+                return None
+            i = (self._next - 1) % self.capacity
+            values = [None if np.isnan(value) else float(value) for value in self._values[i]]
+            return (int(self._ts[i]), *values)
+
+    def window(self, start: int, end: int,
+               metrics: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Readings with start <= ts <= end, oldest first, as a dict of
+        'ts' (int64) plus one float64 array per metric.
+        """
+        metrics = list(metrics or self.metrics)
+        columns = [self._index[metric] for metric in metrics]
+
+        with self._lock:
+            # Unroll the ring so index 0 is the oldest reading
+            order = (np.arange(self._size) + self._next - self._size) % self.capacity
+            ts = self._ts[order]
+            values = self._values[order][:, columns]
+
+        lo = np.searchsorted(ts, start, side='left')
+        hi = np.searchsorted(ts, end, side='right')
+        result = {'ts': ts[lo:hi]}
+        for i, metric in enumerate(metrics):
+            result[metric] = values[lo:hi, i]
+        return result
+
+    def series(self, metric: str, start: int, end: int, max_points: int):
+        """
+        One metric as (ts, avg, min, max) tuples, like SensorDatabase.get_series.
+        Windows with more than max_points readings are reduced to equal-width
+        time buckets in one vectorized pass.
+        """
+        data = self.window(start, end, [metric])
+        ts, values = data['ts'], data[metric]
+        keep = ~np.isnan(values)
+        ts, values = ts[keep], values[keep]
+
+        if len(ts) <= max_points:
+            return [(int(t), float(v), float(v), float(v)) for t, v in zip(ts, values)]
+
+        width = -(-(end - start) // max_points)
+        buckets = ts // width
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        counts = np.diff(np.r_[starts, len(ts)])
+
+        avgs = np.add.reduceat(values, starts) / counts
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        return [(int(b) * width, float(a), float(lo), float(hi))
+                for b, a, lo, hi in zip(buckets[starts], avgs, mins, maxs)]
@@ -0,0 +1,79 @@
+"""Preallocated high-rate sample buffers with vectorized per-interval summaries."""
+import threading
+from typing import Dict, NamedTuple, Sequence
+
+import numpy as np
+
+
+class MetricSummary(NamedTuple):
+    """Statistics of one metric's samples over a logging interval."""
+    count: int
+    mean: float
+    min: float
+    max: float
+    std: float
+
+
+class SampleBuffer:
+    """
+    Collects every sample of a few metrics between two log writes.
+
+    Storage is one preallocated (capacity x metrics) float array, so adding
+    a sample never allocates. summarize() reduces the whole block to
+    count/mean/min/max/std per metric in a single vectorized pass and
+    empties the buffer. Samples beyond capacity are counted in `overflow`
+    and dropped; size it for a couple of intervals' worth.
+    """
+
+    def __init__(self, metrics: Sequence[str], capacity: int):
+        """Preallocate room for `capacity` samples of `metrics`."""
+        self.metrics = tuple(metrics)
+        self.capacity = capacity
+        self.overflow = 0
+
+        self._values = np.full((capacity, len(self.metrics)), np.nan)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, values: Dict[str, float]) -> bool:
+        """Store one sample; missing or non-numeric values become NaN. False if full."""
+        row = [value if isinstance(value, (int, float)) else np.nan
+               for value in (values.get(metric) for metric in self.metrics)]
+
+        with self._lock:
+            if self._size >= self.capacity:
+                self.overflow += 1
+                return False
+            self._values[self._size] = row
+            self._size += 1
+        return True
+
+    def summarize(self) -> Dict[str, MetricSummary]:
+        """
+        Statistics of the buffered samples per metric (metrics with no
+        samples are left out), then empty the buffer. std is the population
+        standard deviation.
+        """
+        with self._lock:
+            block = self._values[:self._size].copy()
+            self._values[:self._size] = np.nan
+            self._size = 0
+
+        valid = ~np.isnan(block)
+        counts = valid.sum(axis=0)
+        safe_counts = np.maximum(counts, 1)
+
+        means = np.where(valid, block, 0.0).sum(axis=0) / safe_counts
+        mins = np.where(valid, block, np.inf).min(axis=0, initial=np.inf)
+        maxs = np.where(valid, block, -np.inf).max(axis=0, initial=-np.inf)
+        deviations = np.where(valid, block - means, 0.0)
+        stds = np.sqrt((deviations ** 2).sum(axis=0) / safe_counts)
+
+        return {
+            metric: MetricSummary(int(counts[i]), float(means[i]), float(mins[i]),
+                                  float(maxs[i]), float(stds[i]))
+            for i, metric in enumerate(self.metrics) if counts[i]
+        }
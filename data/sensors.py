@@ -1,144 +1,589 @@
 """Sensor reading logic with platform-specific implementations."""
-import random
+import math
+import threading
 import time
-from typing import Dict, Optional
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from config.constants import (SENSOR_DEADBANDS, SENSOR_DISPLAY_MAX_AGE, SENSOR_DRIVERS,
+                              SENSOR_FILTERS, SENSOR_HIGH_RATE,
+                              SENSOR_LATENCY_BUCKETS_MS, SENSOR_LOG_INTERVAL,
+                              SENSOR_MAX_FAILURES, SENSOR_MOCK, SENSOR_READ_TIMEOUT,
+                              SENSOR_SAMPLE_INTERVALS, SENSOR_STALE_INTERVALS,
+                              TEXT_COLOR)
+from data.aqi import AirQuality, NowCast, aqi_category, pm25_category
+from data.drivers import (SensorDriver, default_deadband, default_filter, get_drivers,
+                          metric_info)
+from data.filters import Deadband, SensorFilter
+from data.mock_sensors import SyntheticSensors, create_mock_backend
+from data.sampling import MetricSummary, SampleBuffer
 from utils.platform_detect import is_raspberry_pi
 
 
+MOCK_NOTICE = "\nFalling back to mocked sensor data for now..."
+RETRY_NOTICE = "\nThe sensor will be retried while the dashboard runs..."
+
+
+def device_filter(metrics: Sequence[str]) -> SensorFilter:
+    """
+    SensorFilter for one device's metrics, configured from SENSOR_FILTERS or
+    else derived from the metric's declaration.
+    """
+    config = {}
+    for metric in metrics:
+        info = metric_info(metric)
+        if metric in SENSOR_FILTERS:
+            config[metric] = SENSOR_FILTERS[metric]
+        elif info is not None:
+            config[metric] = default_filter(info)
+    return SensorFilter(config)
+
+
+class LatencyHistogram:
+    """Counts of read latencies in fixed millisecond buckets."""
+
+    def __init__(self, bounds: Sequence[float] = SENSOR_LATENCY_BUCKETS_MS):
+        """bounds are ascending bucket upper limits in ms; one more bucket catches the rest."""
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        """Add one latency sample."""
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding the q-th percentile (inf past the last)."""
+        total = sum(self.counts)
+        if not total:
+            return None
+        rank = q / 100 * total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else float('inf')
+        return float('inf')
+
+    def snapshot(self) -> Dict:
+        """Counts per bucket label ('<=10ms', ..., '>2500ms') plus summary figures."""
+        labels = [f"<={bound:g}ms" for bound in self.bounds] + [f">{self.bounds[-1]:g}ms"]
+        total = sum(self.counts)
+        return {
+            'buckets': dict(zip(labels, self.counts)),
+            'avg_ms': self.total_ms / total if total else 0.0,
+            'max_ms': self.max_ms,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+        }
+
+
+class SensorWorker:
+    """
+    Samples one device on its own interval in a background thread and
+    caches the latest values with the time they were read. With a filter,
+    the cached values are the filtered ones and the raw sample is kept
+    alongside.
+
+    With a timeout, each read runs on its own daemon I/O thread and is
+    abandoned if it takes longer, so a hung I2C transaction costs one
+    timeout instead of the worker, and never blocks interpreter exit. While an abandoned read is still stuck, later reads fail
+    straight away rather than piling more threads onto the bus. After
+    max_failures consecutive failures, reinit_func is called to re-create
+    the device. Failed reads keep the last good values cached.
+
+    With a SampleBuffer, every raw sample is also collected for the
+    per-interval summary (see SensorReader.summarize), and on_sample is
+    called with every raw sample and its timestamp.
+    """
+
+    def __init__(self, name: str, read_func: Callable[[], Dict[str, float]],
+                 interval: float, sensor_filter: Optional[SensorFilter] = None,
+                 timeout: Optional[float] = None, max_failures: int = SENSOR_MAX_FAILURES,
+                 reinit_func: Optional[Callable[[], None]] = None,
+                 buffer: Optional[SampleBuffer] = None,
+                 on_sample: Optional[Callable[[Dict[str, float], float], None]] = None,
+                 metrics: Sequence[str] = (),
+                 stale_intervals: float = SENSOR_STALE_INTERVALS):
+        """
+        read_func returns the device's values; metrics are their names,
+        cached as None until the first good read. interval and timeout are in
+        seconds (timeout None reads inline with no watchdog). reinit_func
+        re-creates the device after max_failures consecutive failures.
+        buffer collects every raw sample; on_sample(raw, timestamp) sees it.
+        Values older than stale_intervals intervals (plus the timeout) are
+        stale; see current().
+        """
+        self.name = name
+        self.read_func = read_func
+        self.interval = interval
+        self.filter = sensor_filter
+        self.timeout = timeout
+        self.max_failures = max_failures
+        self.reinit_func = reinit_func
+        self.buffer = buffer
+        self.on_sample = on_sample
+        self.stale_after = stale_intervals * interval + (timeout or 0)
+
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(metrics)
+        self._raw = dict.fromkeys(metrics)
+        self._timestamp = None
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._hung = None
+        self.latency = LatencyHistogram()
+        self._stats = {'reads': 0, 'failures': 0, 'timeouts': 0,
+                       'consecutive_failures': 0, 'reinits': 0, 'last_error': None}
+
+    def sample(self):
+        """
+        Read the device once and cache the result. Failures are counted
+        (and trigger re-initialization) before being raised.
+        """
+        started = time.perf_counter()
+        try:
+            raw = self._call(self.read_func)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        # Summaries describe what the sensor measured, spikes included
+        if self.buffer is not None:
+            self.buffer.add(raw)
+        values = self.filter.update(raw) if self.filter else raw
+        timestamp = time.time()
+        if self.on_sample is not None:
+            self.on_sample(raw, timestamp)
+        with self._lock:
+            self._raw = raw
+            self._values = values
+            self._timestamp = timestamp
+            self.latency.record(elapsed_ms)
+            self._stats['reads'] += 1
+            if self._stats['consecutive_failures']:
+                print(f"✓ {self.name} recovered after "
+                      f"{self._stats['consecutive_failures']} failed reads")
+            self._stats['consecutive_failures'] = 0
+
+    def _call(self, func: Callable):
+        """Run func on a daemon I/O thread, giving up after the timeout."""
+        if self.timeout is None:
+            return func()
+
+        if self._hung is not None:
+            if self._hung.is_alive():
+                raise TimeoutError("previous read is still hung")
+            self._hung = None
+
+        result = {}
+
+        def run():
+            try:
+                result['value'] = func()
+            except BaseException as e:
+                result['error'] = e
+
+        # Daemon, unlike executor threads, so a stuck read can't hold up exit
+        thread = threading.Thread(target=run, name=f"I2C-{self.name}", daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+        if thread.is_alive():
+            # The stuck thread can't be killed; abandon it
+            self._hung = thread
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"read took longer than {self.timeout:g}s")
+        if 'error' in result:
+            raise result['error']
+        return result['value']
+
+    def _record_failure(self, error: Exception):
+        """Count a failed read and re-initialize the device after too many in a row."""
+        with self._lock:
+            self._stats['failures'] += 1
+            self._stats['consecutive_failures'] += 1
+            self._stats['last_error'] = str(error)
+            failures = self._stats['consecutive_failures']
+
+        if failures == 1:
+            print(f"Error sampling {self.name}: {error}")
+        if self.reinit_func and failures % self.max_failures == 0:
+            self.reinit()
+
+    def reinit(self):
+        """
+        Re-create the device through reinit_func and reset its filter.
+        Only the first attempt of a failure run is reported, so a device
+        that stays absent doesn't flood the log.
+        """
+        with self._lock:
+            self._stats['reinits'] += 1
+            failures = self._stats['consecutive_failures']
+        verbose = failures <= self.max_failures
+        if verbose:
+            print(f"Re-initializing {self.name} after {failures} failed reads...")
+        try:
+            self._call(self.reinit_func)
+        except Exception as e:
+            if verbose:
+                print(f"Error re-initializing {self.name}: {e} (retrying every "
+                      f"{self.max_failures} failed reads)")
+            return
+        if self.filter:
+            self.filter.reset()
+        print(f"✓ {self.name} re-initialized")
+
+    def get_stats(self) -> Dict:
+        """
+        Read metrics: reads, failures, timeouts, consecutive_failures,
+        reinits, last_error, age_s of the cached values and the latency
+        histogram with its avg/max/p50/p95 (ms).
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['age_s'] = (time.time() - self._timestamp) if self._timestamp else None
+            stats['latency'] = self.latency.snapshot()
+        if self.buffer is not None:
+            stats['buffer_overflow'] = self.buffer.overflow
+        return stats
+
+    def latest(self, raw: bool = False) -> Tuple[Dict[str, float], Optional[float]]:
+        """
+        Cached (values, timestamp); timestamp is None before the first
+        sample. raw=True returns the unfiltered sample.
+        """
+        with self._lock:
+            return dict(self._raw if raw else self._values), self._timestamp
+
+    def current(self, raw: bool = False) -> Dict[str, Optional[float]]:
+        """
+        latest() values, or all None once the last good read is older than
+        stale_after seconds, so a dead device isn't shown or logged frozen.
+        """
+        values, timestamp = self.latest(raw)
+        if timestamp is None or time.time() - timestamp > self.stale_after:
+            return dict.fromkeys(values)
+        return values
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"Sensor-{self.name}",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the sampling thread; an abandoned I/O thread is left to exit."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+
+    def _run(self):
+        """Sample on a fixed schedule; a slow read delays only this device."""
+        next_sample = time.monotonic() + self.interval
+        while not self._stop.wait(max(0.0, next_sample - time.monotonic())):
+            try:
+                self.sample()
+            except Exception:
+                # Counted and reported by sample(); keep the last good values
+                pass
+            # Skip missed slots rather than bursting to catch up
+            next_sample = max(next_sample + self.interval, time.monotonic())
+
+
 class SensorReader:
-    """Reads environmental sensors with automatic platform detection."""
+    """
+    Reads environmental sensors with automatic platform detection.
+
+    Every driver named in SENSOR_DRIVERS (see data/drivers.py) is sampled by
+    its own SensorWorker at its preferred interval (or the
+    SENSOR_SAMPLE_INTERVALS override), so devices never wait on each other,
+    and smoothed by the SENSOR_FILTERS stage (median, EMA, outlier
+    rejection). read() merges the freshest cached values and never waits on
+    I2C. Reads are timed and abandoned after SENSOR_READ_TIMEOUT, and a
+    device that fails SENSOR_MAX_FAILURES times in a row is re-initialized;
+    get_stats() reports both.
 
-    def __init__(self):
-        """Initialize sensor reader based on platform."""
+    In high-rate mode (SENSOR_HIGH_RATE) every raw sample also goes into a
+    preallocated per-device SampleBuffer, and summarize() reduces each
+    logging interval to count/mean/min/max/std per metric for
+    SensorDatabase.log_summary.
+
+    Every raw PM2.5 sample feeds an incremental EPA NowCast (data/aqi.py),
+    so air_quality() has a smoothed, standards-based AQI on every tick.
+
+    display_update() adds the AQI to the reading, passes it through the
+    SENSOR_DEADBANDS stage and only returns it when a displayed value or
+    the AQI category has moved enough to be worth redrawing.
+
+    On a Raspberry Pi, a device that is missing or fails to initialize is
+    retried through its worker's re-initialization until it responds.
+    Without an I2C bus, values come from the SENSOR_MOCK backend: seeded
+    synthetic data or a replayed recording. On a Pi whose I2C bus can't be
+    set up, a plain event-free synthetic series stands in instead, and its
+    metrics are listed in mock_metrics: measured() drops them, so they are
+    never logged, fed to the NowCast or alerted on.
+    """
+
+    def __init__(self, mock_config: Optional[Dict] = None,
+                 drivers: Optional[Sequence[str]] = None,
+                 high_rate: Optional[bool] = None):
+        """
+        Initialize sensor reader based on platform and start sampling.
+        mock_config, drivers and high_rate override SENSOR_MOCK,
+        SENSOR_DRIVERS and SENSOR_HIGH_RATE.
+        """
+        self.high_rate = SENSOR_HIGH_RATE if high_rate is None else high_rate
         self.is_pi = is_raspberry_pi()
-        self.bme680 = None
-        self.pmsa003i = None
+        # Stays set when the I2C bus fails and is_pi falls back to mocks
+        self.hardware = self.is_pi
+        self.mock_metrics = set()
+        self.i2c = None
+        self.mock = None
+        self.drivers = [cls() for cls in get_drivers(drivers or SENSOR_DRIVERS)]
 
         if self.is_pi:
             self._init_real_sensors()
         else:
             print("Running on non-Pi platform - using mocked sensor data")
+        if not self.is_pi:
+            # No I2C bus, whether off a Pi or because setting it up failed
+            self.mock = self._init_mock(mock_config or SENSOR_MOCK)
+
+        self.nowcast = NowCast()
+        self.workers = [self._create_worker(driver) for driver in self.drivers]
+        bands = {metric.name: default_deadband(metric)
+                 for driver in self.drivers for metric in driver.metrics}
+        bands.update(SENSOR_DEADBANDS)
+        self.deadband = Deadband(
+            bands,
+            {'aqi': lambda aqi: aqi_category(aqi).key},
+            SENSOR_DISPLAY_MAX_AGE
+        )
+
+        # Sample once up front so the first read() already has values
+        for worker in self.workers:
+            try:
+                worker.sample()
+            except Exception:
+                # Already reported; the worker keeps retrying on its schedule
+                pass
+            worker.start()
 
     def _init_real_sensors(self):
-        """Initialize real I2C sensors on Raspberry Pi."""
+        """Initialize the I2C bus and every driver's device on Raspberry Pi."""
         try:
             import board
-            import adafruit_bme680
-            from adafruit_pm25.i2c import PM25_I2C
-
-            # Initialize BME680
-            i2c = board.I2C()
-            self.bme680 = adafruit_bme680.Adafruit_BME680_I2C(i2c)
-
-            # Sea level pressure for altitude compensation
-            self.bme680.sea_level_pressure = 1013.25
-
-            # Initialize PMSA003I
-            reset_pin = None  # Using default I2C address
-            self.pmsa003i = PM25_I2C(i2c, reset_pin)
-
-            print("✓ Real sensors initialized successfully")
 
+            self.i2c = board.I2C()
         except ImportError as e:
-            print("=" * 60)
-            print("⚠️  SENSOR LIBRARIES NOT INSTALLED")
-            print("=" * 60)
-            print(f"Missing module: {e}")
-            print("\nTo enable real sensors, install these packages:")
-            print("  pip3 install adafruit-circuitpython-bme680")
-            print("  pip3 install adafruit-circuitpython-pm25")
-            print("  pip3 install adafruit-blinka")
-            print("\nAlso ensure I2C is enabled:")
-            print("  sudo raspi-config > Interface Options > I2C > Enable")
-            print("\nFalling back to mocked sensor data for now...")
-            print("=" * 60)
+            self._print_missing_libraries(e, ['adafruit-blinka'])
             self.is_pi = False
+            return
         except Exception as e:
-            print("=" * 60)
-            print("⚠️  SENSOR INITIALIZATION ERROR")
-            print("=" * 60)
-            print(f"Error: {e}")
-            print("\nPossible causes:")
-            print("  - Sensors not connected to I2C")
-            print("  - Wrong I2C address")
-            print("  - I2C not enabled (run: sudo raspi-config)")
-            print("\nCheck wiring:")
-            print("  BME680:   SDA→GPIO2, SCL→GPIO3, VCC→3.3V, GND→GND")
-            print("  PMSA003I: SDA→GPIO2, SCL→GPIO3, VCC→5V, GND→GND")
-            print("\nFalling back to mocked sensor data for now...")
-            print("=" * 60)
+            self._print_init_error(e, self.drivers)
             self.is_pi = False
+            return
+
+        failed = []
+        for driver in self.drivers:
+            try:
+                driver.init(self.i2c)
+            except ImportError as e:
+                self._print_missing_libraries(e, list(driver.packages), retrying=True)
+            except Exception as e:
+                failed.append(driver)
+                self._print_init_error(e, [driver], retrying=True)
+            else:
+                print(f"✓ {driver.name} initialized")
+
+        if failed or any(driver.device is None for driver in self.drivers):
+            print("Sensors that failed to initialize are retried while running")
+        else:
+            print("✓ Real sensors initialized successfully")
+
+    def _print_missing_libraries(self, error: Exception, packages: List[str],
+                                 retrying: bool = False):
+        """Explain how to install the libraries a sensor needs."""
+        print("=" * 60)
+        print("⚠️  SENSOR LIBRARIES NOT INSTALLED")
+        print("=" * 60)
+        print(f"Missing module: {error}")
+        print("\nTo enable real sensors, install these packages:")
+        for package in packages:
+            print(f"  pip3 install {package}")
+        print("\nAlso ensure I2C is enabled:")
+        print("  sudo raspi-config > Interface Options > I2C > Enable")
+        print(RETRY_NOTICE if retrying else MOCK_NOTICE)
+        print("=" * 60)
+
+    def _print_init_error(self, error: Exception, drivers: List[SensorDriver],
+                          retrying: bool = False):
+        """Explain the usual causes of a sensor that won't initialize."""
+        print("=" * 60)
+        print("⚠️  SENSOR INITIALIZATION ERROR")
+        print("=" * 60)
+        print(f"Error: {error}")
+        print("\nPossible causes:")
+        print("  - Sensors not connected to I2C")
+        print("  - Wrong I2C address")
+        print("  - I2C not enabled (run: sudo raspi-config)")
+        print("\nCheck wiring:")
+        for driver in drivers:
+            print(f"  {driver.name.upper() + ':':<10}{driver.wiring}")
+        print(RETRY_NOTICE if retrying else MOCK_NOTICE)
+        print("=" * 60)
+
+    def _create_worker(self, driver: SensorDriver) -> SensorWorker:
+        """Worker sampling a driver's device, or the mock backend without an I2C bus."""
+        metrics = driver.metric_names()
+        interval = SENSOR_SAMPLE_INTERVALS.get(driver.name, driver.sample_interval)
+
+        if self.is_pi:
+            # Errors, including a device that failed to initialize, propagate
+            # to the worker, which counts them and re-initializes the device
+            # rather than substituting mock data
+            read_func = lambda: self._read_driver(driver)
+            reinit_func = lambda: driver.init(self.i2c)
+        else:
+            read_func = lambda: self.mock.read(metrics)
+            reinit_func = None
+            if self.hardware:
+                # Placeholders on a real dashboard; keep them out of storage
+                self.mock_metrics.update(metrics)
+        mocked = bool(self.mock_metrics.intersection(metrics))
+
+        buffer = None
+        if self.high_rate and not mocked:
+            # Room for two intervals, in case a log write is late
+            buffer = SampleBuffer(metrics, 2 * math.ceil(SENSOR_LOG_INTERVAL / interval) + 1)
+
+        on_sample = None
+        if 'pm25' in metrics and not mocked:
+            on_sample = lambda raw, timestamp: self.nowcast.add(raw.get('pm25'), timestamp)
+
+        return SensorWorker(driver.name, read_func, interval, device_filter(metrics),
+                            timeout=SENSOR_READ_TIMEOUT, reinit_func=reinit_func,
+                            buffer=buffer, on_sample=on_sample, metrics=metrics)
 
-    def read(self) -> Dict[str, float]:
+    @staticmethod
+    def _read_driver(driver: SensorDriver) -> Dict[str, float]:
+        """Read a driver's device; raises while it isn't initialized."""
+        if driver.device is None:
+            raise OSError(f"{driver.name} is not initialized")
+        return driver.read()
+
+    def _init_mock(self, config: Dict):
         """
-        Read all sensor values.
-        Returns dict with keys: temperature, humidity, pressure, gas_resistance,
-                                pm1, pm25, pm10
+        Mock backend used without an I2C bus; synthetic if the config is
+        unusable, and plain event-free synthetic data on a Pi whose bus
+        failed to initialize.
         """
-        if self.is_pi and self.bme680 and self.pmsa003i:
-            return self._read_real_sensors()
-        else:
-            return self._read_mock_sensors()
+        if self.hardware:
+            print("Showing event-free placeholder values; they are not logged")
+            return SyntheticSensors(seed=config.get('seed', 0), event_rate=0.0,
+                                    dropout_rate=0.0)
 
-    def _read_real_sensors(self) -> Dict[str, float]:
-        """Read data from real I2C sensors."""
         try:
-            # Read BME680
-            temp_c = self.bme680.temperature
-            temp_f = (temp_c * 9/5) + 32
-            humidity = self.bme680.humidity
-            pressure_hpa = self.bme680.pressure
-            pressure_inhg = pressure_hpa * 0.02953
-            gas_resistance = self.bme680.gas
-
-            # Read PMSA003I
-            pm_data = self.pmsa003i.read()
-            pm1 = pm_data["pm10 standard"]
-            pm25 = pm_data["pm25 standard"]
-            pm10 = pm_data["pm100 standard"]
-
-            return {
-                'temperature': round(temp_f, 1),
-                'humidity': round(humidity, 1),
-                'pressure': round(pressure_inhg, 2),
-                'gas_resistance': round(gas_resistance, 0),
-                'pm1': pm1,
-                'pm25': pm25,
-                'pm10': pm10
-            }
+            backend = create_mock_backend(config)
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading mock sensor backend: {e}")
+            print("Falling back to synthetic sensor data")
+            return SyntheticSensors()
 
-        except Exception as e:
-            print(f"Error reading sensors: {e}")
-            # Fall back to mock data on error
-            return self._read_mock_sensors()
+        print(f"✓ Mock sensors: {config.get('mode', 'synthetic')} "
+              f"at {backend.speed:g}x speed")
+        return backend
 
-    def _read_mock_sensors(self) -> Dict[str, float]:
-        """Generate mock sensor data for testing on Mac."""
-        return {
-            'temperature': round(random.uniform(68, 74), 1),
-            'humidity': round(random.uniform(35, 45), 1),
-            'pressure': round(random.uniform(29.8, 30.2), 2),
-            'gas_resistance': round(random.uniform(50000, 200000), 0),
-            'pm1': round(random.uniform(3, 10), 1),
-            'pm25': round(random.uniform(5, 15), 1),
-            'pm10': round(random.uniform(8, 20), 1)
-        }
+    def metrics(self) -> List[str]:
+        """Names of every metric the configured drivers produce."""
+        return [metric for driver in self.drivers for metric in driver.metric_names()]
 
-    def get_air_quality_status(self, pm25: float) -> tuple:
+    def read(self, raw: bool = False) -> Dict[str, float]:
         """
-        Determine air quality status based on PM2.5.
-        Returns (status_text, color)
+        Latest filtered value of every sensor (the last unfiltered sample
+        with raw=True), merged from each device's cache. Every metric is
+        present; it is None until its device has been read successfully,
+        and again while its last good read is stale (SensorWorker.current).
+        Returns dict keyed by metric name (see metrics()); with the default
+        drivers: temperature, humidity, pressure, gas_resistance, pm1, pm25, pm10
         """
-        from config.constants import (FOREST_COLOR, MODERATE_YELLOW,
-                                      WARNING_ORANGE, ALERT_RED, UNHEALTHY_PURPLE)
+        data = {}
+        for worker in self.workers:
+            data.update(worker.current(raw))
+        return data
 
-        if pm25 <= 12:
-            return ("Good", FOREST_COLOR)
-        elif pm25 <= 35:
-            return ("Moderate", MODERATE_YELLOW)
-        elif pm25 <= 55:
-            return ("Unhealthy for Sensitive", WARNING_ORANGE)
-        elif pm25 <= 150:
-            return ("Unhealthy", ALERT_RED)
-        else:
-            return ("Very Unhealthy", UNHEALTHY_PURPLE)
+    def measured(self, values: Dict[str, float]) -> Dict[str, float]:
+        """values without the placeholder metrics of mock_metrics."""
+        return {metric: value for metric, value in values.items()
+                if metric not in self.mock_metrics}
+
+    def air_quality(self, pm25: Optional[float] = None) -> Optional[AirQuality]:
+        """
+        Current NowCast AQI. Until the NowCast has two of the last three
+        hours, it is based on `pm25` (default: the current measured PM2.5).
+        None without any PM2.5 data.
+        """
+        if pm25 is None:
+            pm25 = self.measured(self.read()).get('pm25')
+        return self.nowcast.air_quality(pm25)
+
+    def display_update(self, values: Optional[Dict[str, float]] = None
+                       ) -> Optional[Dict[str, float]]:
+        """
+        The current reading (or `values`) with 'aqi' and 'nowcast_pm25'
+        added, if it differs from the last one returned beyond the
+        deadbands or changes AQI category, else None. The first call always
+        returns the reading.
+        """
+        values = dict(self.read() if values is None else values)
+        air = self.air_quality(self.measured(values).get('pm25'))
+        if air is not None:
+            values['aqi'] = air.aqi
+            values['nowcast_pm25'] = air.pm25 if air.nowcast else None
+        return self.deadband.update(values, time.time())
+
+    def summarize(self) -> Dict[str, MetricSummary]:
+        """
+        Summary of every sample since the last call, per metric, and empty
+        the buffers. Empty unless in high-rate mode.
+        """
+        summary = {}
+        for worker in self.workers:
+            if worker.buffer is not None:
+                summary.update(worker.buffer.summarize())
+        return summary
+
+    def latest(self) -> Dict[str, Tuple[Dict[str, float], Optional[float]]]:
+        """
+        Per-device cache: {device: (values, timestamp)}, timestamp in epoch
+        seconds (None if the device has not been read yet).
+        """
+        return {worker.name: worker.latest() for worker in self.workers}
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Per-device read metrics (see SensorWorker.get_stats), plus display redraws."""
+        stats = {worker.name: worker.get_stats() for worker in self.workers}
+        stats['display'] = {'checked': self.deadband.checked,
+                            'redraws': self.deadband.changes}
+        return stats
+
+    def stop(self):
+        """Stop the sampling threads."""
+        for worker in self.workers:
+            worker.stop()
+
+    def get_air_quality_status(self, pm25: float) -> tuple:
+        """
+        EPA AQI category of a PM2.5 concentration (see data/aqi.py).
+        Returns (status_text, color); ("N/A", TEXT_COLOR) without a value
+        """
+        category = pm25_category(pm25)
+        if category is None:
+            return ("N/A", TEXT_COLOR)
+        return (category.short_name, category.color)
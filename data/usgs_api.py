@@ -11,9 +11,14 @@ class USGSClient:
 
     BASE_URL = "https://waterservices.usgs.gov/nwis/iv/"
 
-    def __init__(self, cache_dir: str = "cache"):
-        """Initialize USGS client with caching."""
+    def __init__(self, cache_dir: str = "cache", database=None):
+        """
+        Initialize USGS client with caching.
+        database: optional SensorDatabase that every fetched value is
+        appended to (river_readings), building up local history.
+        """
         self.cache_dir = cache_dir
+        self.database = database
         os.makedirs(cache_dir, exist_ok=True)
 
     def fetch_site_data(self, site_id: str) -> Optional[Dict]:
@@ -44,6 +49,7 @@ class USGSClient:
             # Cache the result
             if result:
                 self._cache_site_data(site_id, result)
+                self._store_history(site_id, data)
 
             return result
 
@@ -129,6 +135,41 @@ class USGSClient:
         except Exception as e:
             print(f"Error caching data for {site_id}: {e}")
 
+    def _store_history(self, site_id: str, data: dict):
+        """Append every value in a USGS response to the history database."""
+        if self.database is None:
+            return
+
+        try:
+            rows = []
+            for series in data['value']['timeSeries']:
+                variable = series['variable']
+                parameter = variable['variableCode'][0]['value']
+                no_data = variable.get('noDataValue')
+
+                for val in series['values'][0]['value']:
+                    value = float(val['value'])
+                    if value == no_data:
+                        continue
+                    ts = datetime.fromisoformat(val['dateTime'].replace('Z', '+00:00'))
+                    rows.append((site_id, parameter, ts, value))
+
+            self.database.log_river_readings(rows)
+        except Exception as e:
+            print(f"Error storing river history for {site_id}: {e}")
+
+    def get_history(self, site_id: str, parameter: str = '00060',
+                    hours: int = 72) -> List[tuple]:
+        """
+        Stored (ts, value) readings for a site over the last N hours, in
+        USGS units (00060 = discharge cfs, 00010 = temperature C).
+        """
+        if self.database is None:
+            return []
+        end = datetime.now()
+        return self.database.get_river_readings(site_id, parameter,
+                                                end - timedelta(hours=hours), end)
+
     def _load_cached_data(self, site_id: str) -> Optional[Dict]:
         """Load site data from cache file."""
         cache_file = os.path.join(self.cache_dir, f"usgs_{site_id}.json")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Sensor database maintenance tool.
+
+Usage:
+  python3 db_tool.py import readings.csv [--utc] [--device NAME] [--db sensor_data.db]
+  python3 db_tool.py merge other_node.db [--device NAME] [--full] [--db sensor_data.db]
+  python3 db_tool.py backup /media/usb/backup [--full] [--no-verify] [--db sensor_data.db]
+  python3 db_tool.py simulate --days 90 [--interval 60] [--seed 1] [--db sensor_data.db]
+"""
+
+import argparse
+import sys
+import time
+
+from config.constants import (SENSOR_DB_PARTITION, SENSOR_DEVICE_ID, SENSOR_DRIVERS,
+                              SENSOR_RETENTION)
+from data.csv_readings import read_csv_rows
+from data.database import SensorDatabase
+from data.drivers import device_metrics, driver_metrics
+from data.mock_sensors import SyntheticSensors
+
+
+def open_database(path):
+    """Open the database with the same layout the dashboard uses."""
+    metrics = [metric.name for metric in driver_metrics(SENSOR_DRIVERS)]
+    return SensorDatabase(path, retention=SENSOR_RETENTION, partition=SENSOR_DB_PARTITION,
+                          device_id=SENSOR_DEVICE_ID, metrics=metrics)
+
+
+def cmd_import(args):
+    """Bulk-import readings from a CSV file."""
+    db = open_database(args.db)
+    started = time.time()
+    try:
+        rows = read_csv_rows(args.csv_file, args.utc, args.device, db.metrics)
+        totals = db.import_rows(rows, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    elapsed = time.time() - started
+    print(f"✓ Imported {totals['inserted']} readings "
+          f"({totals['skipped']} duplicates skipped) in {elapsed:.1f}s")
+
+
+def cmd_merge(args):
+    """Merge new readings from other nodes' database files."""
+    db = open_database(args.db)
+    try:
+        for source in args.sources:
+            started = time.time()
+            totals = db.merge_from(source, device=args.device, full=args.full)
+            elapsed = time.time() - started
+            print(f"✓ {source}: merged {totals['inserted']} readings "
+                  f"({totals['skipped']} already present) in {elapsed:.1f}s")
+        print(f"Devices: {', '.join(db.device_ids())}")
+    finally:
+        db.close()
+
+
+def cmd_backup(args):
+    """Back up the database (safe while the dashboard is running)."""
+    db = open_database(args.db)
+    try:
+        result = db.backup(args.dest_dir, incremental=not args.full, verify=not args.no_verify)
+    finally:
+        db.close()
+
+    print(f"✓ Copied {result['files']} files ({result['bytes'] / 1e6:.1f} MB), "
+          f"skipped {result['skipped']} unchanged shards in {result['seconds']}s")
+    if result['verified'] is False:
+        print("Error: backup failed verification")
+        sys.exit(1)
+
+
+def cmd_simulate(args):
+    """Fill the database with seeded synthetic history ending now."""
+    sensors = SyntheticSensors(seed=args.seed)
+    end = int(time.time())
+    db = open_database(args.db)
+    rows = sensors.generate(end - int(args.days * 86400), end, args.interval,
+                            device_metrics(SENSOR_DRIVERS), db.metrics)
+    started = time.time()
+    try:
+        totals = db.import_rows(rows, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    elapsed = time.time() - started
+    print(f"✓ Generated {totals['inserted']} readings over {args.days:g} days "
+          f"({totals['skipped']} already present) in {elapsed:.1f}s")
+
+
+def main():
+    """Parse arguments and run the requested command."""
+    parser = argparse.ArgumentParser(description="Sensor database maintenance tool")
+    parser.add_argument('--db', default='sensor_data.db', help="database file (default: sensor_data.db)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = commands.add_parser('import', help="bulk-import readings from CSV")
+    import_parser.add_argument('csv_file', help="CSV with ts/timestamp and metric columns")
+    import_parser.add_argument('--utc', action='store_true',
+                               help="treat timestamps without an offset as UTC (default: local time)")
+    import_parser.add_argument('--chunk-size', type=int, default=50000,
+                               help="rows per transaction (default: 50000)")
+    import_parser.add_argument('--device', help="device_id for rows without one (default: this node)")
+    import_parser.set_defaults(func=cmd_import)
+
+    merge_parser = commands.add_parser('merge', help="merge other nodes' databases into this one")
+    merge_parser.add_argument('sources', nargs='+', help="database files of other nodes")
+    merge_parser.add_argument('--device', help="device_id to store the merged readings under")
+    merge_parser.add_argument('--full', action='store_true',
+                              help="rescan whole files instead of only new readings")
+    merge_parser.set_defaults(func=cmd_merge)
+
+    backup_parser = commands.add_parser('backup', help="copy the live database to a directory")
+    backup_parser.add_argument('dest_dir', help="backup directory")
+    backup_parser.add_argument('--full', action='store_true',
+                               help="copy every shard, not only changed ones")
+    backup_parser.add_argument('--no-verify', action='store_true',
+                               help="skip PRAGMA quick_check on the copies")
+    backup_parser.set_defaults(func=cmd_backup)
+
+    simulate_parser = commands.add_parser('simulate', help="fill the database with synthetic history")
+    simulate_parser.add_argument('--days', type=float, default=30,
+                                 help="days of history ending now (default: 30)")
+    simulate_parser.add_argument('--interval', type=int, default=60,
+                                 help="seconds between readings (default: 60)")
+    simulate_parser.add_argument('--seed', type=int, default=1, help="series seed (default: 1)")
+    simulate_parser.add_argument('--chunk-size', type=int, default=50000,
+                                 help="rows per transaction (default: 50000)")
+    simulate_parser.set_defaults(func=cmd_simulate)
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,7 +17,9 @@ from config.rivers import RIVER_STATIONS
 from config.towns import WEATHER_LOCATIONS
 
 # Import data modules
-from data.database import SensorDatabase
+from data.aqi import NOWCAST_HOURS
+from data.database import SensorDatabase, StorageTuning
+from data.drivers import driver_metrics
 from data.sensors import SensorReader
 from data.usgs_api import USGSClient
 from data.nws_api import NWSClient
@@ -70,20 +72,29 @@ class RiverDashboard(tk.Tk):
             'alert_dismissed_until': None
         }
 
-        # Initialize database
-        self.database = SensorDatabase("sensor_data.db")
-
-        # Initialize sensor reader
+        # Initialize database, with a column for every configured driver's metrics
+        self.database = SensorDatabase("sensor_data.db", retention=SENSOR_RETENTION,
+                                       partition=SENSOR_DB_PARTITION,
+                                       device_id=SENSOR_DEVICE_ID,
+                                       metrics=[metric.name for metric in
+                                                driver_metrics(SENSOR_DRIVERS)],
+                                       tuning=StorageTuning(
+                                           recent_hours=SENSOR_RECENT_HOURS,
+                                           recent_interval=SENSOR_DISPLAY_INTERVAL))
+
+        # Initialize sensor reader, with the NowCast seeded from stored hours
         self.sensor_reader = SensorReader()
+        self.load_nowcast_history()
 
         # Initialize API clients
-        self.usgs_client = USGSClient(cache_dir="cache")
-        self.nws_client = NWSClient(cache_dir="cache")
+        self.usgs_client = USGSClient(cache_dir="cache", database=self.database)
+        self.nws_client = NWSClient(cache_dir="cache", database=self.database)
 
         # Threading control
         self.running = True
         self.sensor_thread = None
         self.api_thread = None
+        self.maintenance_thread = None
 
         # Create UI
         self.create_ui()
@@ -179,6 +190,10 @@ class RiverDashboard(tk.Tk):
         self.api_thread = threading.Thread(target=self.api_loop, daemon=True)
         self.api_thread.start()
 
+        # Database retention/vacuum thread
+        self.maintenance_thread = threading.Thread(target=self.maintenance_loop, daemon=True)
+        self.maintenance_thread.start()
+
     def sensor_loop(self):
         """Background loop for reading sensors."""
         last_log_time = 0
@@ -187,27 +202,35 @@ class RiverDashboard(tk.Tk):
             try:
                 # Read sensors
                 sensor_data = self.sensor_reader.read()
-                self.app_data['sensor_data'] = sensor_data
+                # Placeholder values for sensors that aren't there are
+                # shown but never stored or alerted on
+                measured = self.sensor_reader.measured(sensor_data)
+
+                # Keep recent history in memory for graphs
+                if measured:
+                    self.database.recent.append(time.time(), measured)
 
-                # Log to database every 60 seconds
+                # Log to database every 60 seconds: a summary of every
+                # sample in high-rate mode, else the current reading
                 current_time = time.time()
                 if current_time - last_log_time >= SENSOR_LOG_INTERVAL:
-                    self.database.log_reading(
-                        sensor_data['temperature'],
-                        sensor_data['humidity'],
-                        sensor_data['pressure'],
-                        sensor_data['gas_resistance'],
-                        sensor_data['pm1'],
-                        sensor_data['pm25'],
-                        sensor_data['pm10']
-                    )
+                    summary = self.sensor_reader.summarize()
+                    if summary:
+                        self.database.log_summary(summary)
+                    elif measured:
+                        self.database.log_reading(**measured)
                     last_log_time = current_time
 
                 # Check for air quality alerts
-                self.check_air_quality_alert(sensor_data['pm25'])
+                self.check_air_quality_alert(
+                    self.sensor_reader.air_quality(measured.get('pm25')))
 
-                # Update UI (must be done in main thread)
-                self.after(0, self.update_sensor_display)
+                # Update UI (must be done in main thread), only when a shown
+                # value or the air quality status moved past its deadband
+                display_data = self.sensor_reader.display_update(sensor_data)
+                if display_data is not None:
+                    self.app_data['sensor_data'] = display_data
+                    self.after(0, self.update_sensor_display)
 
             except Exception as e:
                 print(f"Error in sensor loop: {e}")
@@ -226,6 +249,26 @@ class RiverDashboard(tk.Tk):
             # Wait for next update cycle
             time.sleep(API_UPDATE_INTERVAL)
 
+    def maintenance_loop(self):
+        """Background loop for pruning old sensor data and backing it up."""
+        last_backup = 0
+        while self.running:
+            try:
+                deleted = self.database.prune()
+                print(f"Database maintenance: {deleted}")
+                print(f"Database writer: {self.database.get_stats()}")
+                print(f"Sensor reads: {self.sensor_reader.get_stats()}")
+
+                if DB_BACKUP_DIR and time.time() - last_backup >= DB_BACKUP_INTERVAL:
+                    result = self.database.backup(DB_BACKUP_DIR)
+                    last_backup = time.time()
+                    print(f"Database backup: {result}")
+            except Exception as e:
+                print(f"Error in maintenance loop: {e}")
+
+            # Wait for next maintenance pass
+            time.sleep(DB_MAINTENANCE_INTERVAL)
+
     def fetch_api_data(self):
         """Fetch data from APIs."""
         print("Fetching API data...")
@@ -297,9 +340,23 @@ class RiverDashboard(tk.Tk):
             if hasattr(tab, 'update_display'):
                 tab.update_display()
 
-    def check_air_quality_alert(self, pm25):
+    def load_nowcast_history(self):
+        """Seed the PM2.5 NowCast with the stored hourly averages of the last 12 hours."""
+        if 'pm25' not in self.database.metrics:
+            return
+
+        # Whole hours only; the current one fills from live samples
+        current_hour = int(time.time()) // 3600 * 3600
+        start = current_hour - (NOWCAST_HOURS - 1) * 3600
+        try:
+            self.sensor_reader.nowcast.load(self.database.get_series(
+                'pm25', start, current_hour - 1, max_points=NOWCAST_HOURS))
+        except Exception as e:
+            print(f"Error loading PM2.5 history for NowCast: {e}")
+
+    def check_air_quality_alert(self, air):
         """Check if air quality alert should be shown."""
-        if not isinstance(pm25, (int, float)):
+        if air is None:
             return
 
         # Check if alert is dismissed
@@ -309,35 +366,29 @@ class RiverDashboard(tk.Tk):
             else:
                 self.app_data['alert_dismissed_until'] = None
 
-        # Check if PM2.5 exceeds threshold
-        if pm25 >= PM25_ALERT_THRESHOLD:
+        # Check if the AQI exceeds threshold
+        if air.aqi >= AQI_ALERT_THRESHOLD:
             # Don't show alert if already on Indoor Air tab
             if self.current_tab == 'Indoor Air':
                 return
 
             # Show alert if not already shown
             if not self.alert_overlay:
-                self.after(0, lambda: self.show_alert(pm25))
+                self.after(0, lambda: self.show_alert(air))
 
-    def show_alert(self, pm25):
-        """Show air quality alert overlay."""
+    def show_alert(self, air):
+        """Show air quality alert overlay for an AirQuality."""
         if self.alert_overlay:
             return
 
-        # Determine severity
-        if pm25 <= 55:
-            level = "Unhealthy for Sensitive Groups"
-            color = ALERT_ORANGE
-        elif pm25 <= 150:
-            level = "Unhealthy"
-            color = ALERT_RED
-        else:
-            level = "Very Unhealthy"
-            color = "#8b0000"
+        # Severity is the AQI category
+        level = air.category.name
+        color = air.category.color
+        basis = "NowCast" if air.nowcast else "current"
 
         # Create overlay
         self.alert_overlay = tk.Frame(self, bg=BG_COLOR, relief=tk.RAISED, borderwidth=3)
-        self.alert_overlay.place(relx=0.5, rely=0.5, anchor=tk.CENTER, width=500, height=200)
+        self.alert_overlay.place(relx=0.5, rely=0.5, anchor=tk.CENTER, width=500, height=240)
 
         # Title
         title = tk.Label(
@@ -352,7 +403,8 @@ class RiverDashboard(tk.Tk):
         # Message
         message = tk.Label(
             self.alert_overlay,
-            text=f"PM2.5: {pm25} µg/m³ ({level})\nConsider closing windows or running filter",
+            text=f"AQI {air.aqi} ({level})\nPM2.5: {air.pm25:.1f} µg/m³ {basis}\n"
+                 f"Consider closing windows or running filter",
             bg=BG_COLOR,
             fg=TEXT_COLOR,
             font=(FONT_FAMILY, FONT_SIZE_MEDIUM),
@@ -422,6 +474,20 @@ class RiverDashboard(tk.Tk):
         if self.api_thread:
             self.api_thread.join(timeout=1)
 
+        # Stop the per-sensor sampling threads
+        self.sensor_reader.stop()
+
+        # Keep the samples of the unfinished logging interval
+        try:
+            summary = self.sensor_reader.summarize()
+            if summary:
+                self.database.log_summary(summary)
+        except Exception as e:
+            print(f"Error logging final sensor summary: {e}")
+
+        # Checkpoint and release database connections (writes queued readings)
+        self.database.close()
+
         self.destroy()
 
 
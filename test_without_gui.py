@@ -4,8 +4,13 @@ Test dashboard functionality WITHOUT GUI
 This lets you verify all the logic works even if Tkinter has issues
 """
 
+import os
+import sqlite3
+import tempfile
 import time
-from data.database import SensorDatabase
+from datetime import datetime
+from data.aqi import NowCast
+from data.database import ROLLUP_RESOLUTIONS, SCHEMA_VERSION, SensorDatabase
 from data.sensors import SensorReader
 from data.usgs_api import USGSClient
 from data.nws_api import NWSClient
@@ -55,7 +60,7 @@ db.log_reading(
 )
 latest = db.get_latest_reading()
 if latest:
-    print(f"Latest reading timestamp: {latest[0]}")
+    print(f"Latest reading timestamp: {datetime.fromtimestamp(latest[0])}")
     print(f"Latest temperature: {latest[1]}°F")
 print("✓ Database operations successful\n")
 
@@ -109,8 +114,81 @@ for pm25 in test_pm25_values:
     status, color = sensor_reader.get_air_quality_status(pm25)
     alert = "🔔 ALERT!" if pm25 >= 35 else "OK"
     print(f"PM2.5 = {pm25:3d} → {status:25s} {alert}")
+
+# A NowCast needs 2 of the last 3 hours; older data must not keep an alert up
+nowcast = NowCast()
+now = time.time()
+for minute in range(3 * 60):
+    nowcast.add(80.0, now - 10 * 3600 + minute * 60)
+air = nowcast.air_quality(5.0)
+assert not air.nowcast and air.pm25 == 5.0, air
+for minute in range(3 * 60):
+    nowcast.add(80.0, now - 3 * 3600 + minute * 60)
+air = nowcast.air_quality(5.0)
+assert air.nowcast and air.category.key == 'unhealthy', air
+print(f"NowCast of 3 recent hours at 80 µg/m³ → AQI {air.aqi}; stale hours ignored")
 print("✓ Alert logic working correctly\n")
 
+# Test 6: Database Schema Migration
+print("=" * 60)
+print("TEST 6: Database Schema Migration")
+print("=" * 60)
+with tempfile.TemporaryDirectory() as tmp:
+    legacy_path = os.path.join(tmp, "legacy.db")
+    conn = sqlite3.connect(legacy_path)
+    # The original schema: CURRENT_TIMESTAMP text, no device_id
+    conn.execute('''
+        CREATE TABLE sensor_readings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            temperature REAL,
+            humidity REAL,
+            pressure REAL,
+            gas_resistance REAL,
+            pm1 REAL,
+            pm25 REAL,
+            pm10 REAL
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO sensor_readings (timestamp, temperature, pm25) VALUES (?, ?, ?)",
+        [('2024-01-01 00:00:00', 70.0, 5.0),
+         ('2024-01-01 00:00:30', 72.0, 7.0),
+         ('2024-01-01 00:01:00', 74.0, 9.0)])
+    conn.commit()
+    conn.close()
+
+    migrated = SensorDatabase(legacy_path, device_id='legacy-node')
+    migrated.close()
+
+    conn = sqlite3.connect(legacy_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    rows = conn.execute("SELECT device_id, ts, temperature FROM sensor_readings "
+                        "ORDER BY ts").fetchall()
+    assert rows == [('legacy-node', 1704067200, 70.0),
+                    ('legacy-node', 1704067230, 72.0),
+                    ('legacy-node', 1704067260, 74.0)], rows
+    minutes = conn.execute('''
+        SELECT bucket, count, sum, min, max FROM sensor_rollups
+        WHERE device_id = 'legacy-node' AND resolution = 60 AND metric = 'temperature'
+        ORDER BY bucket
+    ''').fetchall()
+    assert minutes == [(1704067200, 2, 142.0, 70.0, 72.0),
+                       (1704067260, 1, 74.0, 74.0, 74.0)], minutes
+    for resolution in ROLLUP_RESOLUTIONS:
+        count = conn.execute('''
+            SELECT SUM(count) FROM sensor_rollups
+            WHERE resolution = ? AND metric = 'pm25'
+        ''', (resolution,)).fetchone()[0]
+        assert count == 3, (resolution, count)
+    assert conn.execute("SELECT device_id FROM devices").fetchall() == [('legacy-node',)]
+    assert conn.execute("SELECT value FROM settings "
+                        "WHERE key = 'device_id'").fetchone() == ('legacy-node',)
+    conn.close()
+print(f"Legacy database upgraded to schema {SCHEMA_VERSION}: "
+      f"{len(rows)} readings, epoch ts, rollups and device_id as expected")
+print("✓ Schema migration working correctly\n")
+
 # Summary
 print("=" * 60)
 print("SUMMARY")
@@ -121,6 +199,7 @@ print("✓ Database operations")
 print("✓ USGS API integration")
 print("✓ NWS API integration")
 print("✓ Air quality alert logic")
+print("✓ Database schema migration")
 print()
 print("The dashboard logic is fully functional!")
 print("Only the Tkinter GUI has compatibility issues on your Mac.")
@@ -2,6 +2,9 @@
 import tkinter as tk
 from datetime import datetime
 from config.constants import *
+from data.aqi import aqi_category
+from data.database import READING_COLUMNS
+from data.drivers import driver_metrics, metric_info
 from ui.components import TouchButton
 import matplotlib
 matplotlib.use('TkAgg')
@@ -61,7 +64,9 @@ class IndoorTab(tk.Frame):
         readings_frame = tk.Frame(content_frame, bg=BG_COLOR)
         readings_frame.pack(fill=tk.BOTH, expand=True, padx=PADDING * 4)
 
-        sensor_data = self.app_data.get('sensor_data', {})
+        # Devices not read yet report None; show those as N/A
+        sensor_data = {metric: value for metric, value in
+                       self.app_data.get('sensor_data', {}).items() if value is not None}
 
         # Temperature
         self.create_reading_display(
@@ -85,25 +90,13 @@ class IndoorTab(tk.Frame):
             f"{pressure} inHg" if pressure != 'N/A' else 'N/A'
         )
 
-        # Air Quality
-        pm25 = sensor_data.get('pm25', 0)
-        if isinstance(pm25, (int, float)):
-            # Use the new AQI_THRESHOLDS with colors
-            if pm25 <= 12:
-                status = "Good"
-                color = FOREST_COLOR
-            elif pm25 <= 35:
-                status = "Moderate"
-                color = MODERATE_YELLOW
-            elif pm25 <= 55:
-                status = "Unhealthy for Sensitive"
-                color = WARNING_ORANGE
-            elif pm25 <= 150:
-                status = "Unhealthy"
-                color = ALERT_RED
-            else:
-                status = "Very Unhealthy"
-                color = UNHEALTHY_PURPLE
+        # Air Quality: EPA AQI category of the NowCast (see data/aqi.py)
+        pm25 = sensor_data.get('pm25', 'N/A')
+        aqi = sensor_data.get('aqi')
+        category = aqi_category(aqi)
+        if category is not None:
+            status = category.short_name
+            color = category.color
         else:
             status = "N/A"
             color = TEXT_COLOR
@@ -131,14 +124,29 @@ class IndoorTab(tk.Frame):
         )
         quality_value.pack(side=tk.RIGHT)
 
-        # PM2.5
+        # PM2.5, with the AQI
+        pm25_text = f"{pm25} µg/m³" if pm25 != 'N/A' else 'N/A'
+        if category is not None:
+            pm25_text += f" (AQI {aqi})"
         self.create_reading_display(
             readings_frame,
             "PM2.5:",
-            f"{pm25} µg/m³ ({status})" if pm25 != 'N/A' else 'N/A',
+            pm25_text,
             value_color=color
         )
 
+        # Metrics of any additional sensor drivers (e.g. CO2)
+        for metric in driver_metrics(SENSOR_DRIVERS):
+            if metric.name in READING_COLUMNS:
+                continue
+            value = sensor_data.get(metric.name)
+            self.create_reading_display(
+                readings_frame,
+                f"{metric.label}:",
+                f"{value:.{metric.decimals}f} {metric.unit}".rstrip()
+                if isinstance(value, (int, float)) else 'N/A'
+            )
+
         # View Graphs button
         graph_btn = TouchButton(
             content_frame,
@@ -198,13 +206,8 @@ class IndoorTab(tk.Frame):
         self.sidebar.pack(side=tk.LEFT, fill=tk.Y)
         self.sidebar.pack_propagate(False)
 
-        self.metrics = [
-            ('temperature', 'Temperature'),
-            ('humidity', 'Humidity'),
-            ('pressure', 'Pressure'),
-            ('gas_resistance', 'Air Quality'),
-            ('pm25', 'PM2.5')
-        ]
+        self.metrics = [(metric.name, metric.label)
+                        for metric in driver_metrics(SENSOR_DRIVERS) if metric.graph]
 
         self.metric_buttons = {}
         for metric_key, metric_label in self.metrics:
@@ -227,7 +230,7 @@ class IndoorTab(tk.Frame):
         # Title
         self.graph_title = tk.Label(
             graph_area,
-            text=f"{self.get_metric_label(self.selected_metric)} - Last {self.selected_hours} Hours",
+            text=f"{self.get_metric_label(self.selected_metric)} - Last {self.get_range_label(self.selected_hours)}",
             bg=BG_COLOR,
             fg=TEXT_COLOR,
             font=(FONT_FAMILY, FONT_SIZE_LARGE, 'bold')
@@ -250,10 +253,10 @@ class IndoorTab(tk.Frame):
             font=(FONT_FAMILY, FONT_SIZE_SMALL)
         ).pack(side=tk.LEFT, padx=5)
 
-        for hours in [24, 48, 72]:
+        for hours, range_text in GRAPH_TIME_RANGES:
             btn = TouchButton(
                 time_frame,
-                text=f"{hours}hr",
+                text=range_text,
                 command=lambda h=hours: self.select_time_range(h),
                 font=(FONT_FAMILY, FONT_SIZE_SMALL),
                 bg=ACCENT_COLOR if hours == self.selected_hours else BUTTON_BG
@@ -287,7 +290,7 @@ class IndoorTab(tk.Frame):
         self.selected_metric = metric_key
         # Just redraw the graph, don't recreate entire view
         if hasattr(self, 'graph_title'):
-            self.graph_title.config(text=f"{self.get_metric_label(metric_key)} - Last {self.selected_hours} Hours")
+            self.graph_title.config(text=f"{self.get_metric_label(metric_key)} - Last {self.get_range_label(self.selected_hours)}")
         self.draw_graph()
         # Update sidebar buttons
         if hasattr(self, 'graph_view'):
@@ -296,7 +299,7 @@ class IndoorTab(tk.Frame):
     def select_time_range(self, hours):
         """Select time range for graph."""
         self.selected_hours = hours
-        self.graph_title.config(text=f"{self.get_metric_label(self.selected_metric)} - Last {hours} Hours")
+        self.graph_title.config(text=f"{self.get_metric_label(self.selected_metric)} - Last {self.get_range_label(hours)}")
         self.draw_graph()
 
     def _update_metric_buttons(self):
@@ -311,14 +314,14 @@ class IndoorTab(tk.Frame):
 
     def get_metric_label(self, metric_key):
         """Get display label for metric."""
-        labels = {
-            'temperature': 'Temperature',
-            'humidity': 'Humidity',
-            'pressure': 'Pressure',
-            'gas_resistance': 'Air Quality',
-            'pm25': 'PM2.5'
-        }
-        return labels.get(metric_key, metric_key)
+        metric = metric_info(metric_key)
+        return metric.label if metric else metric_key
+
+    def get_range_label(self, hours):
+        """Get display label for a graph time range."""
+        if hours > 72 and hours % 24 == 0:
+            return f"{hours // 24} Days"
+        return f"{hours} Hours"
 
     def draw_graph(self):
         """Draw graph for selected metric."""
@@ -326,10 +329,13 @@ class IndoorTab(tk.Frame):
         for widget in self.graph_canvas_frame.winfo_children():
             widget.destroy()
 
-        # Get data from database
-        readings = self.database.get_readings(hours=self.selected_hours)
+        # Get data from database (raw rows or rollups, capped in size);
+        # repeated redraws are served from the database's result cache
+        series = self.database.get_recent_series(self.selected_metric,
+                                                 self.selected_hours * 3600,
+                                                 max_points=GRAPH_MAX_POINTS)
 
-        if not readings:
+        if not series:
             no_data = tk.Label(
                 self.graph_canvas_frame,
                 text="No data available yet",
@@ -340,42 +346,19 @@ class IndoorTab(tk.Frame):
             no_data.pack(expand=True)
             return
 
-        # Parse data
-        timestamps = []
-        values = []
-
-        metric_index = {
-            'temperature': 1,
-            'humidity': 2,
-            'pressure': 3,
-            'gas_resistance': 4,
-            'pm25': 6
-        }
-
-        idx = metric_index.get(self.selected_metric, 1)
-
-        for reading in readings:
-            try:
-                timestamps.append(datetime.fromisoformat(reading[0]))
-                values.append(reading[idx])
-            except:
-                continue
-
-        if not values:
-            no_data = tk.Label(
-                self.graph_canvas_frame,
-                text="No data available",
-                bg=BG_COLOR,
-                fg=TEXT_COLOR,
-                font=(FONT_FAMILY, FONT_SIZE_LARGE)
-            )
-            no_data.pack(expand=True)
-            return
+        # Parse data (rows are ts, avg, min, max)
+        timestamps = [datetime.fromtimestamp(row[0]) for row in series]
+        values = [row[1] for row in series]
+        lows = [row[2] for row in series]
+        highs = [row[3] for row in series]
 
         # Create matplotlib figure
         fig = Figure(figsize=(6, 4), facecolor='#1a1a1a')
         ax = fig.add_subplot(111)
 
+        # Min-max envelope behind the average when rows are buckets
+        if lows != highs:
+            ax.fill_between(timestamps, lows, highs, color='#4a9eff', alpha=0.2, linewidth=0)
         ax.plot(timestamps, values, color='#4a9eff', linewidth=2)
         ax.set_facecolor('#1a1a1a')
         ax.spines['bottom'].set_color('#ffffff')
@@ -389,14 +372,8 @@ class IndoorTab(tk.Frame):
         # Labels
         ax.set_xlabel('Time', color='#ffffff')
 
-        unit_labels = {
-            'temperature': '°F',
-            'humidity': '%',
-            'pressure': 'inHg',
-            'gas_resistance': 'Ohms',
-            'pm25': 'µg/m³'
-        }
-        ax.set_ylabel(f"{self.get_metric_label(self.selected_metric)} ({unit_labels.get(self.selected_metric, '')})",
+        metric = metric_info(self.selected_metric)
+        ax.set_ylabel(f"{self.get_metric_label(self.selected_metric)} ({metric.unit if metric else ''})",
                      color='#ffffff')
 
         fig.autofmt_xdate()
@@ -2,6 +2,7 @@
 import tkinter as tk
 from datetime import datetime
 from config.constants import *
+from data.aqi import aqi_category
 
 
 class OverviewTab(tk.Frame):
@@ -324,7 +325,9 @@ class OverviewTab(tk.Frame):
         for widget in self.indoor_content_frame.winfo_children():
             widget.destroy()
 
-        sensor_data = self.app_data.get('sensor_data', {})
+        # Devices not read yet report None; show those as N/A
+        sensor_data = {metric: value for metric, value in
+                       self.app_data.get('sensor_data', {}).items() if value is not None}
 
         if sensor_data:
             temp = sensor_data.get('temperature', 'N/A')
@@ -332,28 +335,13 @@ class OverviewTab(tk.Frame):
             pressure = sensor_data.get('pressure', 'N/A')
             pm25 = sensor_data.get('pm25', 'N/A')
 
-            # Get air quality status
-            if isinstance(pm25, (int, float)):
-                if pm25 <= 12:
-                    status = "Good"
-                    status_color = FOREST_COLOR
-                    emoji = "✅"
-                elif pm25 <= 35:
-                    status = "Moderate"
-                    status_color = MODERATE_YELLOW
-                    emoji = "⚠️"
-                elif pm25 <= 55:
-                    status = "Unhealthy for Sensitive"
-                    status_color = WARNING_ORANGE
-                    emoji = "⚠️"
-                elif pm25 <= 150:
-                    status = "Unhealthy"
-                    status_color = ALERT_RED
-                    emoji = "🚨"
-                else:
-                    status = "Very Unhealthy"
-                    status_color = UNHEALTHY_PURPLE
-                    emoji = "🚨"
+            # Get air quality status from the NowCast AQI
+            aqi = sensor_data.get('aqi')
+            category = aqi_category(aqi)
+            if category is not None:
+                status = category.short_name
+                status_color = category.color
+                emoji = category.emoji
             else:
                 status = "N/A"
                 status_color = TEXT_MUTED
@@ -402,9 +390,10 @@ class OverviewTab(tk.Frame):
 
             # PM2.5 detail
             if isinstance(pm25, (int, float)):
+                aqi_text = f" · AQI {aqi}" if category is not None else ""
                 tk.Label(
                     self.indoor_content_frame,
-                    text=f"PM2.5: {pm25:.1f} µg/m³",
+                    text=f"PM2.5: {pm25:.1f} µg/m³{aqi_text}",
                     bg=CARD_BG,
                     fg=TEXT_MUTED,
                     font=(FONT_FAMILY, FONT_SIZE_SMALL),